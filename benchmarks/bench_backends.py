@@ -0,0 +1,106 @@
+"""
+bench_backends.py - Cloud vs local transcription latency on this machine.
+
+Every backend profile named on the command line (from the "backends" section
+of ~/.voice-type-config.json, e.g. "groq" and "local") transcribes the same
+clips --runs times. Each backend is warmed first (connection opened, model
+loaded) and the warm-up is reported separately, so the table shows the
+steady-state cost a dictation pays after release: median and p90 latency and
+the real-time factor (latency / audio length).
+
+Cloud clips are uploaded as FLAC, as dictations are by default; the local
+backend reads the WAV buffer directly. The corpus is a directory of 16 kHz
+16-bit mono WAV files (e.g. saved "VoiceType Recordings"); the synthetic clips
+from bench_codecs.py are used otherwise, which time fine but transcribe to
+nothing useful.
+
+Usage:
+    python benchmarks/bench_backends.py [--profiles groq,local] [--corpus DIR] [--runs 5]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_codecs import load_corpus, synthetic_clip  # noqa: E402
+from modules.backends import DEFAULT_BACKENDS, make_backend  # noqa: E402
+from modules.core import CONFIG_FILE, SAMPLE_RATE  # noqa: E402
+from modules.encode import PcmBuffer, available_codecs, encode_audio  # noqa: E402
+from modules.net import ApiClient  # noqa: E402
+
+
+def clip_upload(pcm, local):
+    """transcribe() arguments for one clip, as live dictation would send it."""
+    buf = PcmBuffer(SAMPLE_RATE)
+    buf.extend(pcm)
+    if local:
+        return {"audio": bytes(buf.wav())}
+    encoded = encode_audio(buf, "flac" if "flac" in available_codecs() else "wav")
+    return {"audio": bytes(encoded.payload), "filename": encoded.filename,
+            "content_type": encoded.content_type, "audio_seconds": buf.duration}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", default="groq,local", help="comma-separated backend profiles")
+    parser.add_argument("--corpus", help="directory of 16 kHz 16-bit mono WAV files")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    config = json.loads(CONFIG_FILE.read_text()) if CONFIG_FILE.exists() else {}
+    profiles = config.get("backends") or DEFAULT_BACKENDS
+
+    if args.corpus:
+        clips = [(name, pcm) for name, rate, pcm in load_corpus(args.corpus) if rate == SAMPLE_RATE]
+    else:
+        clips = [(f"synthetic_{s}s", synthetic_clip(s, seed=s)) for s in (2, 5, 10)]
+    if not clips:
+        print("No 16 kHz clips to benchmark")
+        return
+    audio_seconds = sum(len(pcm) / 2 / SAMPLE_RATE for _name, pcm in clips)
+    print(f"corpus: {len(clips)} clips, {audio_seconds:.1f} s of audio, {args.runs} runs\n")
+
+    client = ApiClient(max_connections=2)
+    print(f"{'backend':<10} {'clip':<24} {'median ms':>10} {'p90 ms':>8} {'RTF':>6}  text")
+    try:
+        for name in args.profiles.split(","):
+            if name not in profiles:
+                print(f"{name:<10} (no such profile)")
+                continue
+            backend = make_backend(profiles[name], client, config.get("api_key", ""))
+            problem = backend.problem()
+            if problem:
+                print(f"{name:<10} (unavailable: {problem})")
+                continue
+            t0 = time.perf_counter()
+            backend.warm()
+            backend.transcribe(**clip_upload(clips[0][1], backend.local))   # waits for the warm-up
+            print(f"{name:<10} {'(warm-up)':<24} {(time.perf_counter() - t0) * 1000:10.0f}")
+
+            for clip_name, pcm in clips:
+                upload = clip_upload(pcm, backend.local)
+                seconds = len(pcm) / 2 / SAMPLE_RATE
+                times = []
+                text, error = None, None
+                for _ in range(args.runs):
+                    t0 = time.perf_counter()
+                    text, error = backend.transcribe(**upload)
+                    times.append(time.perf_counter() - t0)
+                times.sort()
+                median = statistics.median(times)
+                p90 = times[min(len(times) - 1, int(len(times) * 0.9))]
+                shown = f"error: {error}" if error else repr((text or "")[:40])
+                print(f"{name:<10} {clip_name:<24} {median * 1000:10.0f} {p90 * 1000:8.0f} "
+                      f"{median / seconds:6.2f}  {shown}")
+            backend.close()
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+bench_codecs.py - Compare upload codecs on a fixed corpus.
+
+For each codec in modules.encode.UPLOAD_CODECS this reports the payload size,
+compression ratio, encode time and the estimated upload time on a few
+uplink speeds. The corpus is either a directory of 16-bit mono WAV files
+(e.g. saved "VoiceType Recordings") or, by default, a deterministic set of
+synthetic speech-like clips so runs are comparable between machines.
+
+Usage:
+    python benchmarks/bench_codecs.py [--corpus DIR]
+"""
+
+import argparse
+import math
+import random
+import struct
+import sys
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.encode import PcmBuffer, UPLOAD_CODECS, available_codecs, encode_audio  # noqa: E402
+
+RATE = 16000
+UPLINKS_MBIT = (1, 5, 20)
+
+
+def synthetic_clip(seconds, seed):
+    """Voiced bursts (harmonics + noise, syllable-rate envelope) separated by pauses."""
+    rng = random.Random(seed)
+    f0 = rng.uniform(100, 220)
+    out = []
+    for i in range(int(seconds * RATE)):
+        t = i / RATE
+        envelope = max(0.0, math.sin(2 * math.pi * 4.0 * t)) * (1.0 if (t % 2.0) < 1.4 else 0.0)
+        voiced = sum(math.sin(2 * math.pi * f0 * k * t) / k for k in range(1, 6))
+        s = 6000 * envelope * voiced + rng.gauss(0, 150)
+        out.append(max(-32768, min(32767, int(s))))
+    return struct.pack(f"<{len(out)}h", *out)
+
+
+def load_corpus(directory):
+    clips = []
+    for path in sorted(Path(directory).glob("*.wav")):
+        with wave.open(str(path), "rb") as wf:
+            if wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+                print(f"skip {path.name}: not 16-bit mono")
+                continue
+            clips.append((path.name, wf.getframerate(), wf.readframes(wf.getnframes())))
+    return clips
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="directory of 16-bit mono WAV files")
+    args = parser.parse_args()
+
+    if args.corpus:
+        clips = load_corpus(args.corpus)
+    else:
+        clips = [(f"synthetic_{s}s", RATE, synthetic_clip(s, seed=s)) for s in (2, 5, 10, 30)]
+    if not clips:
+        print("No clips to benchmark")
+        return
+
+    total_seconds = sum(len(pcm) / 2 / rate for _name, rate, pcm in clips)
+    print(f"corpus: {len(clips)} clips, {total_seconds:.1f} s of audio")
+    codecs = available_codecs()
+    print(f"available codecs: {', '.join(codecs)}\n")
+
+    header = f"{'codec':<6} {'KB':>9} {'ratio':>6} {'encode ms':>10}"
+    header += "".join(f" {f'@{m}Mbit ms':>11}" for m in UPLINKS_MBIT)
+    print(header)
+
+    for codec in UPLOAD_CODECS:
+        if codec not in codecs:
+            print(f"{codec:<6} (unavailable: install soundfile with libsndfile >= 1.0.29)")
+            continue
+        total_bytes = 0
+        total_raw = 0
+        total_encode = 0.0
+        for _name, rate, pcm in clips:
+            buf = PcmBuffer(rate)
+            buf.extend(pcm)
+            encoded = encode_audio(buf, codec)
+            total_bytes += encoded.size
+            total_raw += encoded.raw_size
+            total_encode += encoded.encode_time
+        row = f"{codec:<6} {total_bytes / 1024:9.1f} {total_raw / total_bytes:6.2f} {total_encode * 1000:10.1f}"
+        row += "".join(f" {total_bytes * 8 / (m * 1e6) * 1000:11.0f}" for m in UPLINKS_MBIT)
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+bench_idle.py - Idle cost of hotkey detection: 50 Hz polling vs key hooks.
+
+"poll" reproduces the old hotkey_loop: keyboard.is_pressed() for the hotkey
+and F1-F3 every 20 ms. "hooks" registers key-down/key-up hooks for the same
+keys (as setup_hotkeys does) and then waits. Each mode runs for --seconds
+with no keys pressed and reports the process CPU time and the number of
+context switches (wakeups) per second. Context switches come from
+getrusage on POSIX, or psutil if it is installed (needed on Windows).
+
+The keyboard hook thread exists in both modes (is_pressed starts it too), so
+the difference is the cost of the polling loop itself.
+
+Usage:
+    python benchmarks/bench_idle.py [--seconds 10] [--hotkey shift]
+"""
+
+import argparse
+import threading
+import time
+
+import keyboard
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+KEYS = ("f1", "f2", "f3")
+
+
+def context_switches():
+    if psutil is not None:
+        c = psutil.Process().num_ctx_switches()
+        return c.voluntary + c.involuntary
+    if resource is not None:
+        r = resource.getrusage(resource.RUSAGE_SELF)
+        return r.ru_nvcsw + r.ru_nivcsw
+    return None
+
+
+def run_poll(hotkey, seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        keyboard.is_pressed(hotkey)
+        for key in KEYS:
+            keyboard.is_pressed(key)
+        time.sleep(0.02)
+
+
+def run_hooks(hotkey, seconds):
+    hooks = []
+    for key in (hotkey,) + KEYS:
+        hooks.append(keyboard.on_press_key(key, lambda e: None))
+        hooks.append(keyboard.on_release_key(key, lambda e: None))
+    threading.Event().wait(seconds)
+    for hook in hooks:
+        keyboard.unhook(hook)
+
+
+def measure(name, fn, hotkey, seconds):
+    cpu0, wall0, ctx0 = time.process_time(), time.perf_counter(), context_switches()
+    fn(hotkey, seconds)
+    cpu = time.process_time() - cpu0
+    wall = time.perf_counter() - wall0
+    ctx = context_switches()
+    wakeups = f"{(ctx - ctx0) / wall:8.1f}" if ctx is not None else "     n/a"
+    print(f"{name:<6} {cpu / wall * 1000:10.2f} {wakeups}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--hotkey", default="shift")
+    args = parser.parse_args()
+
+    keyboard.is_pressed(args.hotkey)  # start the listener before measuring
+    print(f"idle for {args.seconds:g}s per mode, hands off the keyboard\n")
+    print(f"{'mode':<6} {'CPU ms/s':>10} {'wakeups/s':>8}")
+    measure("poll", run_poll, args.hotkey, args.seconds)
+    measure("hooks", run_hooks, args.hotkey, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+bench_metering.py - Compare chunk level metering implementations.
+
+Runs the old struct.unpack + generator max() path from record_and_transcribe
+against modules.metering (NumPy, audioop or memoryview, whichever is available)
+on 1024-sample chunks of synthetic speech-like audio.
+
+Usage:
+    python benchmarks/bench_metering.py
+"""
+
+import math
+import random
+import struct
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules import metering  # noqa: E402
+
+CHUNK = 1024
+RUNS = 2000
+
+
+def make_chunk(seed=0):
+    rng = random.Random(seed)
+    samples = [
+        int(8000 * math.sin(i / 7.0) + rng.gauss(0, 600))
+        for i in range(CHUNK)
+    ]
+    return struct.pack(f"<{CHUNK}h", *[max(-32768, min(32767, s)) for s in samples])
+
+
+def legacy_peak(data):
+    samples = struct.unpack(f"<{len(data)//2}h", data)
+    max_samp = max(abs(s) for s in samples) if samples else 0
+    return min(max_samp / 32768.0, 1.0)
+
+
+def bench(name, fn, data):
+    total = timeit.timeit(lambda: fn(data), number=RUNS)
+    per_call_us = total / RUNS * 1e6
+    print(f"{name:<32} {per_call_us:8.1f} µs/chunk")
+    return per_call_us
+
+
+def main():
+    data = make_chunk()
+    if metering.np is not None:
+        backend = "numpy"
+    elif metering.audioop is not None:
+        backend = "audioop"
+    else:
+        backend = "memoryview"
+    print(f"chunk={CHUNK} samples, runs={RUNS}, metering backend={backend}\n")
+
+    assert abs(legacy_peak(data) - metering.peak(data)) < 1e-6
+
+    base = bench("legacy struct+max (peak)", legacy_peak, data)
+    new_peak = bench("metering.peak", metering.peak, data)
+    new_rms = bench("metering.rms", metering.rms, data)
+    new_both = bench("metering.measure (peak+rms)", metering.measure, data)
+
+    print()
+    print(f"peak speed-up:            {base / new_peak:5.1f}x")
+    print(f"peak+rms vs legacy peak:  {base / new_both:5.1f}x")
+    print(f"rms cost:                 {new_rms:5.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
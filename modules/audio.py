@@ -1,75 +1,42 @@
 """
-voice_type_audio.py - Audio recording and Groq Whisper transcription for Voice Type.
+voice_type_audio.py - Audio recording and Whisper transcription for Voice Type.
 
 All functions accept explicit parameters so this module has no globals and
 no imports from voice_type.py (avoids circular imports).
 """
 
 import re
-import tempfile
 import threading
 import time
 from datetime import datetime
 from pathlib import Path
 
-import httpx
-import pyaudio
-import wave
 import tkinter as tk
 
+from .core import SAMPLE_RATE
+from .encode import PcmBuffer, audio_duration, encode_audio, load_pcm
+from .resample import Resampler, can_resample
+from .vad import trim_silence
 
-# ---------------------------------------------------------------------------
-# Groq Whisper transcription
-# ---------------------------------------------------------------------------
-
-def transcribe_with_groq(audio_path, api_key, language="auto", custom_vocabulary=None):
-    """
-    Transcribe an audio file using the Groq Whisper API.
-    Returns (text, error) — one of which will be None.
-    """
-    if not api_key:
-        return None, "No API key"
-
-    try:
-        url = "https://api.groq.com/openai/v1/audio/transcriptions"
-        headers = {"Authorization": f"Bearer {api_key}"}
-
-        with open(audio_path, "rb") as f:
-            files = {"file": ("audio.wav", f, "audio/wav")}
-            data = {"model": "whisper-large-v3-turbo", "response_format": "json"}
-
-            if language and language != "auto":
-                data["language"] = language
-
-            if custom_vocabulary:
-                vocab_prompt = "Context: " + ", ".join(custom_vocabulary[:50])
-                data["prompt"] = vocab_prompt
-
-            with httpx.Client(timeout=30) as client:
-                response = client.post(url, headers=headers, files=files, data=data)
-
-        if response.status_code == 200:
-            return response.json().get("text"), None
-        else:
-            return None, f"HTTP {response.status_code}"
-
-    except Exception as e:
-        return None, str(e)
 
+FILE_CONVERT_MAX_SECONDS = 600   # longer files are sent as they are: decoding holds all of it in memory
 
 # ---------------------------------------------------------------------------
 # File transcription (single + batch)
 # ---------------------------------------------------------------------------
 
-def transcribe_audio_file(api_key, language, capitalize, autohide, widget,
+def transcribe_audio_file(backend, language, capitalize, autohide, widget,
                           type_text_fn, save_history_fn, update_status_fn,
-                          custom_vocabulary=None):
+                          custom_vocabulary=None, trim_guard=None, noise_threshold=0.01,
+                          upload_codec="flac"):
     """
-    Open a file-picker dialog then transcribe the selected audio file(s).
-    Dispatches to _transcribe_single_file or _transcribe_batch_files.
+    Open a file-picker dialog then transcribe the selected audio file(s) with
+    `backend` (see voice_type_backends.py). Dispatches to
+    _transcribe_single_file or _transcribe_batch_files.
     """
-    if not api_key:
-        print("[error] No API key set")
+    problem = backend.problem()
+    if problem:
+        print(f"[error] {problem}")
         return
 
     from tkinter import filedialog
@@ -89,20 +56,68 @@ def transcribe_audio_file(api_key, language, capitalize, autohide, widget,
 
     if len(file_paths) == 1:
         _transcribe_single_file(
-            file_paths[0], api_key, language, capitalize, autohide,
+            file_paths[0], backend, language, capitalize, autohide,
             widget, type_text_fn, save_history_fn, update_status_fn,
             custom_vocabulary=custom_vocabulary,
+            trim_guard=trim_guard, noise_threshold=noise_threshold,
+            upload_codec=upload_codec,
         )
     else:
         _transcribe_batch_files(
-            file_paths, api_key, language, capitalize, save_history_fn,
+            file_paths, backend, language, capitalize, save_history_fn,
             custom_vocabulary=custom_vocabulary,
         )
 
 
-def _transcribe_single_file(file_path, api_key, language, capitalize, autohide,
+def _prepare_file_upload(file_path, trim_guard, noise_threshold, codec="flac"):
+    """
+    Return backend.transcribe() arguments for file_path with leading and
+    trailing silence trimmed, converted to 16 kHz mono (all Whisper uses) and
+    encoded with `codec`. Falls back to the original file if it is longer
+    than FILE_CONVERT_MAX_SECONDS or cannot be decoded, if it is already
+    compressed and trimming would save little, or if the re-encoded audio
+    would not be smaller than the file.
+    """
+    original = {"audio": file_path, "audio_seconds": audio_duration(file_path)}
+    if (original["audio_seconds"] or 0) > FILE_CONVERT_MAX_SECONDS:
+        print(f"[trim] {Path(file_path).name}: longer than {FILE_CONVERT_MAX_SECONDS}s, sending the original")
+        return original
+    buf = load_pcm(file_path)
+    if buf is None:
+        return original
+
+    lead, tail = trim_silence(buf, trim_guard, noise_threshold)
+    print(f"[trim] {Path(file_path).name}: cut {lead + tail:.1f}s (lead {lead:.1f}s, tail {tail:.1f}s)")
+    if lead + tail < 1.0 and Path(file_path).suffix.lower() != ".wav":
+        return original
+
+    if (buf.rate, buf.channels) != (SAMPLE_RATE, 1) and can_resample():
+        converter = Resampler(buf.rate, buf.channels, SAMPLE_RATE, 1)
+        converted = PcmBuffer(SAMPLE_RATE, 1)
+        pcm = buf.pcm()
+        step = buf.rate * buf.block_align   # 1 s at a time keeps the filter's work arrays small
+        for i in range(0, len(pcm), step):
+            converted.extend(converter.process(pcm[i:i + step]))
+        del pcm  # release the view before the buffer is closed
+        buf.close()
+        buf = converted
+
+    encoded = encode_audio(buf, codec)
+    if encoded.size >= Path(file_path).stat().st_size:
+        print(f"[trim] {Path(file_path).name}: re-encoded audio is not smaller, sending the original")
+        return original
+    return {
+        "audio": encoded.payload,
+        "filename": encoded.filename,
+        "content_type": encoded.content_type,
+        "audio_seconds": buf.duration,
+    }
+
+
+def _transcribe_single_file(file_path, backend, language, capitalize, autohide,
                              widget, type_text_fn, save_history_fn, update_status_fn,
-                             custom_vocabulary=None):
+                             custom_vocabulary=None, trim_guard=None, noise_threshold=0.01,
+                             upload_codec="flac"):
     """Transcribe a single audio file and type the result."""
     print(f"[file] Transcribing: {file_path}")
     update_status_fn("processing", "Transcribing file...")
@@ -110,8 +125,12 @@ def _transcribe_single_file(file_path, api_key, language, capitalize, autohide,
         widget.show_widget()
 
     def do_transcribe():
-        text, error = transcribe_with_groq(
-            file_path, api_key, language=language, custom_vocabulary=custom_vocabulary
+        if trim_guard is not None:
+            upload = _prepare_file_upload(file_path, trim_guard, noise_threshold, upload_codec)
+        else:
+            upload = {"audio": file_path, "audio_seconds": audio_duration(file_path)}
+        text, error = backend.transcribe(
+            upload.pop("audio"), language=language, custom_vocabulary=custom_vocabulary, **upload,
         )
 
         if text:
@@ -147,7 +166,7 @@ def _transcribe_single_file(file_path, api_key, language, capitalize, autohide,
     threading.Thread(target=do_transcribe, daemon=True).start()
 
 
-def _transcribe_batch_files(file_paths, api_key, language, capitalize,
+def _transcribe_batch_files(file_paths, backend, language, capitalize,
                              save_history_fn, custom_vocabulary=None):
     """Transcribe multiple audio files in batch, writing results to Desktop."""
     print(f"[batch] Transcribing {len(file_paths)} files...")
@@ -186,13 +205,19 @@ def _transcribe_batch_files(file_paths, api_key, language, capitalize,
         )
 
     def process_files():
+        # Every file is queued at once; the backend's concurrency limit
+        # decides how many run together, and results arrive in order.
+        futures = [
+            backend.submit(path, language=language, custom_vocabulary=custom_vocabulary,
+                           audio_seconds=audio_duration(path))
+            for path in file_paths
+        ]
+
         for i, file_path in enumerate(file_paths, 1):
             filename = Path(file_path).name
             append_progress(f"[{i}/{len(file_paths)}] Processing: {filename}\n")
 
-            text, error = transcribe_with_groq(
-                file_path, api_key, language=language, custom_vocabulary=custom_vocabulary
-            )
+            text, error = futures[i - 1].result()
 
             if text:
                 text = text.strip()
@@ -211,8 +236,6 @@ def _transcribe_batch_files(file_paths, api_key, language, capitalize,
                 results.append({"file": filename, "text": None, "words": 0, "error": error})
                 append_progress(f"  ❌ Error: {error}\n\n")
 
-            time.sleep(0.5)
-
         if results:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             desktop = Path.home() / "Desktop"
@@ -0,0 +1,314 @@
+"""
+voice_type_backends.py - Interchangeable speech-to-text backends.
+
+CloudBackend (Groq or any OpenAI-compatible endpoint), LocalBackend
+(faster-whisper on the CPU) and RaceBackend (two at once for short audio)
+share one submit()/transcribe() interface; make_backend() builds one per profile.
+"""
+
+import io
+import struct
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+from .core import GROQ_MODEL, GROQ_TRANSCRIPTIONS, SAMPLE_RATE
+from .metrics import Metrics
+from .net import latency_bucket
+
+try:
+    import numpy as np
+    from faster_whisper import WhisperModel
+except ImportError:  # the local backend is optional
+    WhisperModel = None
+
+
+BACKEND_TYPES = {
+    "groq": "Groq",
+    "openai": "OpenAI-compatible",
+    "local": "Local (CPU)",
+}
+DEFAULT_BACKENDS = {
+    "groq": {"type": "groq"},
+    "local": {"type": "local", "model": "base", "compute_type": "int8"},
+}
+
+
+class CloudBackend:
+    """OpenAI-compatible transcription endpoint, called through the shared ApiClient."""
+
+    local = False
+
+    def __init__(self, client, api_key="", url=GROQ_TRANSCRIPTIONS, model=GROQ_MODEL,
+                 key_required=True, name="groq"):
+        self.client = client
+        self.api_key = api_key
+        self.url = url
+        self.model = model
+        self.key_required = key_required
+        self.name = name
+
+    def problem(self):
+        if self.key_required and not self.api_key:
+            return "No API key"
+        if not self.url or not self.model:
+            return "Backend needs a URL and a model"
+        return None
+
+    def warm(self):
+        if self.problem() is None:
+            self.client.warm(str(httpx.URL(self.url).join("/")))
+
+    def submit(self, audio, language="auto", custom_vocabulary=None, filename="audio.wav",
+               content_type="audio/wav", audio_seconds=None, hedge=False, wav=None):
+        """`wav` (the same audio as an uncompressed WAV) is for local backends; `audio` is uploaded."""
+        problem = self.problem()
+        if problem:
+            return _done((None, problem))
+        return self.client.submit(
+            audio, self.api_key, language=language, custom_vocabulary=custom_vocabulary,
+            filename=filename, content_type=content_type, audio_seconds=audio_seconds,
+            hedge=hedge, url=self.url, model=self.model,
+        )
+
+    def transcribe(self, audio, **kwargs):
+        return self.submit(audio, **kwargs).result()
+
+    def close(self):
+        """The ApiClient is shared and closed by its owner."""
+
+
+class LocalBackend:
+    """faster-whisper on the CPU, one transcription at a time on a worker thread."""
+
+    local = True
+
+    def __init__(self, model="base", compute_type="int8", threads=0, beam_size=1, name="local"):
+        self.model = model
+        self.compute_type = compute_type
+        self.threads = threads          # 0 = CTranslate2's default
+        self.beam_size = beam_size      # greedy decoding: much faster on a CPU, near-equal accuracy
+        self.name = name
+        self._whisper = None
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-whisper")
+
+    def problem(self):
+        if WhisperModel is None:
+            return "Local backend needs faster-whisper (pip install faster-whisper)"
+        return None
+
+    def warm(self):
+        """Load the model in the background (seconds, once per session)."""
+        if self.problem() is None and self._whisper is None:
+            self._worker.submit(self._load)
+
+    def _load(self):
+        if self._whisper is None:
+            t0 = time.perf_counter()
+            self._whisper = WhisperModel(
+                self.model, device="cpu", compute_type=self.compute_type, cpu_threads=self.threads,
+            )
+            print(f"[local] Loaded {self.model} ({self.compute_type}) "
+                  f"in {time.perf_counter() - t0:.1f}s")
+        return self._whisper
+
+    def submit(self, audio, language="auto", custom_vocabulary=None, filename="audio.wav",
+               content_type="audio/wav", audio_seconds=None, hedge=False, wav=None):
+        """
+        Same arguments as CloudBackend.submit(); the upload-only ones are
+        ignored, and `wav` is read instead of `audio` when given.
+        """
+        problem = self.problem()
+        if problem:
+            return _done((None, problem))
+        audio = audio if wav is None else wav
+        return self._worker.submit(self._transcribe, audio, language, custom_vocabulary)
+
+    def transcribe(self, audio, **kwargs):
+        return self.submit(audio, **kwargs).result()
+
+    def _transcribe(self, audio, language, custom_vocabulary):
+        try:
+            whisper = self._load()
+            prompt = "Context: " + ", ".join(custom_vocabulary[:50]) if custom_vocabulary else None
+            segments, _ = whisper.transcribe(
+                _decode(audio),
+                language=None if not language or language == "auto" else language,
+                initial_prompt=prompt, beam_size=self.beam_size,
+            )
+            return "".join(segment.text for segment in segments).strip(), None
+        except Exception as e:
+            return None, str(e) or type(e).__name__
+
+    def close(self):
+        """Stop taking work; transcriptions already queued still finish."""
+        self._worker.shutdown(wait=False)
+
+
+class RaceBackend:
+    """Two backends in parallel for short audio; the first successful transcript wins."""
+
+    local = False
+
+    def __init__(self, backends, max_seconds=15.0, metrics=None):
+        self.backends = list(backends)
+        self.max_seconds = max_seconds   # longer audio goes to the first backend only
+        self.metrics = metrics
+        self.stats = Metrics(window=100)  # per bucket: races, wins and latency per backend
+        self.name = "+".join(backend.name for backend in self.backends)
+
+    def problem(self):
+        """Ready if either side is; the other simply sits the race out."""
+        problems = [backend.problem() for backend in self.backends]
+        return None if None in problems else problems[0]
+
+    def warm(self):
+        for backend in self.backends:
+            backend.warm()
+
+    def submit(self, audio, language="auto", custom_vocabulary=None, filename="audio.wav",
+               content_type="audio/wav", audio_seconds=None, hedge=False, wav=None):
+        """A cloud racer uploads `audio`; a local one reads `wav` if given, skipping a decode."""
+        kwargs = {
+            "language": language, "custom_vocabulary": custom_vocabulary, "filename": filename,
+            "content_type": content_type, "audio_seconds": audio_seconds, "hedge": hedge, "wav": wav,
+        }
+        ready = [backend for backend in self.backends if backend.problem() is None]
+        if len(ready) < 2 or audio_seconds is None or audio_seconds > self.max_seconds:
+            return (ready or self.backends)[0].submit(audio, **kwargs)
+        # The loser may still read after the caller has released the buffers.
+        if not isinstance(audio, (str, Path)):
+            audio = bytes(audio)
+        if wav is not None:
+            kwargs["wav"] = bytes(wav)
+        return self._race(ready, audio, kwargs, latency_bucket(audio_seconds)[len("latency_"):])
+
+    def transcribe(self, audio, **kwargs):
+        return self.submit(audio, **kwargs).result()
+
+    def _race(self, backends, audio, kwargs, bucket):
+        result = Future()
+        lock = threading.Lock()
+        t0 = time.perf_counter()
+        running = {backend.name: backend.submit(audio, **kwargs) for backend in backends}
+        errors = []
+        decided = []
+
+        def finished(name, future):
+            try:
+                text, error = future.result()
+            except CancelledError:
+                return
+            except Exception as e:
+                text, error = None, str(e) or type(e).__name__
+            elapsed = time.perf_counter() - t0
+            with lock:
+                running.pop(name, None)
+                if decided:
+                    if error is None:   # a loser that was already running (local) finished anyway
+                        self._observe(bucket, name, elapsed)
+                    return
+                if error is not None:
+                    errors.append(f"{name}: {error}")
+                    if running:
+                        return   # wait for the other side
+                    decided.append(None)
+                    self.stats.incr(f"{bucket}:races")
+                    result.set_result((None, "; ".join(errors)))
+                    return
+                decided.append(name)
+                losers = list(running.items())
+            for loser, future in losers:
+                if future.cancel():
+                    self.stats.incr(f"{bucket}:{loser}:cancelled")
+            self._record(bucket, name, elapsed)
+            result.set_result((text, None))
+
+        for name, future in list(running.items()):
+            future.add_done_callback(lambda f, name=name: finished(name, f))
+        return result
+
+    def _observe(self, bucket, name, elapsed):
+        """Latency of one backend's successful transcription, won or lost."""
+        self.stats.observe(f"{bucket}:{name}", elapsed * 1000)
+        if self.metrics is not None:
+            self.metrics.observe(f"race_{name}_ms", elapsed * 1000)
+
+    def _record(self, bucket, winner, elapsed):
+        self.stats.incr(f"{bucket}:races")
+        self.stats.incr(f"{bucket}:{winner}:wins")
+        self._observe(bucket, winner, elapsed)
+        if self.metrics is not None:
+            self.metrics.incr(f"race_wins_{winner}")
+        print(f"[race] {bucket}: {winner} won in {elapsed * 1000:.0f} ms | {self.report(bucket)}")
+
+    def report(self, bucket):
+        """
+        Win rate, latency p50/p90 of every successful transcription and the
+        number of cancelled losses of each backend in one bucket.
+        """
+        races = self.stats.count(f"{bucket}:races")
+        parts = []
+        for backend in self.backends:
+            wins = self.stats.count(f"{bucket}:{backend.name}:wins")
+            line = f"{backend.name} {wins}/{races} wins"
+            cancelled = self.stats.count(f"{bucket}:{backend.name}:cancelled")
+            if cancelled:
+                line += f", {cancelled} cancelled"
+            latency = self.stats.summary(f"{bucket}:{backend.name}")
+            if latency:
+                line += f", p50 {latency['p50']:.0f} ms, p90 {latency['p90']:.0f} ms"
+            parts.append(line)
+        return "; ".join(parts)
+
+    def close(self):
+        for backend in self.backends:
+            backend.close()
+
+
+def _decode(audio):
+    """
+    faster-whisper input for a path or buffer. Our own 16 kHz mono 16-bit WAV
+    buffers become float samples directly; anything else is left to its
+    decoder (PyAV), which also resamples.
+    """
+    if isinstance(audio, (str, Path)):
+        return str(audio)
+    view = memoryview(audio).cast("B")
+    if bytes(view[:4]) == b"RIFF" and len(view) >= 44:
+        channels, rate = struct.unpack_from("<HI", view, 22)
+        bits, = struct.unpack_from("<H", view, 34)
+        if (channels, rate, bits) == (1, SAMPLE_RATE, 16):
+            samples = np.frombuffer(view[44:len(view) & ~1], dtype=np.int16)
+            return samples.astype(np.float32) / 32768.0
+    return io.BytesIO(view)
+
+
+def _done(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def make_backend(profile, client, api_key="", name=None):
+    """
+    Backend for one config profile, named after it in logs. "groq" uses the
+    Groq endpoint and the main API key unless the profile has its own;
+    "openai" needs "url" and "model" (its key is optional); "local" takes
+    "model", "compute_type" and "threads".
+    """
+    kind = profile.get("type", "groq")
+    name = name or kind
+    if kind == "groq":
+        return CloudBackend(client, profile.get("api_key") or api_key,
+                            model=profile.get("model") or GROQ_MODEL, name=name)
+    if kind == "openai":
+        return CloudBackend(client, profile.get("api_key", ""), profile.get("url", ""),
+                            profile.get("model", ""), key_required=False, name=name)
+    if kind == "local":
+        return LocalBackend(profile.get("model", "base"), profile.get("compute_type", "int8"),
+                            profile.get("threads", 0), name=name)
+    raise ValueError(f"Unknown backend type {kind!r}")
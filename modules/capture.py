@@ -0,0 +1,315 @@
+"""
+voice_type_capture.py - Long-lived microphone capture for Voice Type.
+
+CaptureEngine keeps one PortAudio input stream open between recordings,
+optionally filling a pre-roll RingBuffer, and converts the device's native
+format with a Resampler as read()/stop() drain its queue.
+"""
+
+import threading
+import time
+from collections import deque
+
+import pyaudio
+
+from .core import SAMPLE_RATE
+from .resample import Resampler, can_resample
+
+
+class RingBuffer:
+    """Fixed-size byte ring that keeps the most recent `capacity` bytes without reallocating."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._pos = 0
+        self._filled = 0
+
+    def write(self, data):
+        n = len(data)
+        if not n or not self.capacity:
+            return
+        view = memoryview(data)
+        if n >= self.capacity:
+            view = view[n - self.capacity:]
+            n = self.capacity
+        end = self._pos + n
+        if end <= self.capacity:
+            self._buf[self._pos:end] = view
+        else:
+            first = self.capacity - self._pos
+            self._buf[self._pos:] = view[:first]
+            self._buf[:n - first] = view[first:]
+        self._pos = end % self.capacity
+        self._filled = min(self.capacity, self._filled + n)
+
+    def getvalue(self):
+        """Return the buffered bytes, oldest first."""
+        if self._filled < self.capacity:
+            return bytes(self._buf[:self._filled])
+        return bytes(self._buf[self._pos:]) + bytes(self._buf[:self._pos])
+
+    def clear(self):
+        self._pos = 0
+        self._filled = 0
+
+    def __len__(self):
+        return self._filled
+
+
+def native_format(pa, mic_idx, rate, channels):
+    """
+    The device's default rate and (at most stereo) channel count, or the
+    requested rate/channels if the device can't be queried or nothing can
+    convert between the two.
+    """
+    if not can_resample():
+        return rate, channels
+    try:
+        info = pa.get_device_info_by_index(mic_idx)
+        native_rate = int(info.get("defaultSampleRate") or rate)
+        native_channels = max(1, min(2, int(info.get("maxInputChannels") or channels)))
+    except Exception as e:
+        print(f"[capture] Could not query device {mic_idx}: {e}")
+        return rate, channels
+    return native_rate, native_channels
+
+
+def open_input(pa, mic_idx, rate, channels, chunk, callback):
+    """
+    Open a stopped paInt16 callback stream on mic_idx at its native format,
+    falling back to rate/channels. chunk is in frames at `rate`; the device
+    buffer covers the same duration. Returns (stream, rate, channels, frames_per_buffer).
+    """
+    device_rate, device_channels = native_format(pa, mic_idx, rate, channels)
+    while True:
+        frames = max(1, round(chunk * device_rate / rate))
+        try:
+            stream = pa.open(
+                format=pyaudio.paInt16, channels=device_channels, rate=device_rate,
+                input=True, input_device_index=mic_idx,
+                frames_per_buffer=frames, start=False,
+                stream_callback=callback,
+            )
+            return stream, device_rate, device_channels, frames
+        except Exception as e:
+            if (device_rate, device_channels) == (rate, channels):
+                raise
+            print(f"[capture] Native format {device_rate} Hz x{device_channels} failed ({e}), "
+                  f"trying {rate} Hz x{channels}")
+            device_rate, device_channels = rate, channels
+
+
+class CaptureEngine:
+    """
+    Warm, callback-driven PyAudio input stream shared by every recording.
+
+    rate/channels/chunk describe the audio handed to callers; device_rate and
+    device_channels are whatever the open stream actually delivers.
+    """
+
+    def __init__(self, rate=SAMPLE_RATE, chunk=1024, channels=1, preroll=0.0,
+                 max_queue_seconds=10.0):
+        self.rate = rate
+        self.chunk = chunk
+        self.channels = channels
+        self.sample_width = 2  # paInt16
+        self.device_rate = rate
+        self.device_channels = channels
+        self.convert_time = 0.0  # seconds spent converting the current recording
+        self._converter = None
+        self._max_queue_seconds = max_queue_seconds
+        self.preroll = RingBuffer(0)
+        self.preroll_seconds = 0.0
+        self._pa = None
+        self._stream = None
+        self._mic_index = None
+        self._first_chunk_at = None
+        self._last_preroll_len = 0
+        self._lock = threading.Lock()
+
+        # Callback → recorder hand-off. deque.append/popleft are atomic, so the
+        # callback never waits on the consumer; the bound is enforced by hand
+        # so a stalled consumer drops (and counts) chunks instead of growing RAM.
+        self._queue = deque()
+        self._queue_limit = 1   # set per device format in prepare()
+        self._data_ready = threading.Event()
+        self._ring_lock = threading.Lock()
+        self._recording = False
+
+        self.overflows = 0   # PortAudio reported input overflow
+        self.underruns = 0   # PortAudio reported input underflow
+        self.dropped = 0     # chunks discarded because the queue was full
+
+        self.set_preroll(preroll)
+
+    @property
+    def bytes_per_second(self):
+        return self.rate * self.channels * self.sample_width
+
+    @property
+    def converting(self):
+        return self._converter is not None and not self._converter.passthrough
+
+    @property
+    def recording(self):
+        """True from start() to stop(), unless the stream was closed in between."""
+        return self._recording
+
+    # ------------------------------------------------------------------
+    # Device lifecycle
+    # ------------------------------------------------------------------
+
+    def set_preroll(self, seconds):
+        """Resize the pre-roll window. Takes effect the next time the stream is opened."""
+        seconds = max(0.0, float(seconds or 0.0))
+        if seconds == self.preroll_seconds:
+            return
+        self.preroll_seconds = seconds
+        self.reset()
+
+    def prepare(self, mic_index):
+        """Open the input stream for mic_index, reopening only if the device changed."""
+        mic_idx = mic_index if mic_index is not None else 0
+        with self._lock:
+            if self._stream is not None and mic_idx == self._mic_index:
+                return
+            self._close_stream()
+            if self._pa is None:
+                self._pa = pyaudio.PyAudio()
+            t0 = time.perf_counter()
+            self._stream, rate, channels, frames = open_input(
+                self._pa, mic_idx, self.rate, self.channels, self.chunk, self._on_audio,
+            )
+            self.device_rate, self.device_channels = rate, channels
+            self._queue_limit = max(1, int(self._max_queue_seconds * rate / frames))
+            self.preroll = RingBuffer(int(self.preroll_seconds * rate) * channels * self.sample_width)
+            self._converter = Resampler(rate, channels, self.rate, self.channels)
+            self._mic_index = mic_idx
+            print(f"[capture] Opened device {mic_idx} at {self.device_rate} Hz "
+                  f"x{self.device_channels} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+            if self.preroll.capacity:
+                self._stream.start_stream()
+
+    def reset(self):
+        """Drop the current stream (e.g. after a device error) so the next start reopens it."""
+        with self._lock:
+            self._close_stream()
+
+    def close(self):
+        """Close the stream and release PortAudio."""
+        with self._lock:
+            self._close_stream()
+            if self._pa is not None:
+                self._pa.terminate()
+                self._pa = None
+
+    def _close_stream(self):
+        if self._stream is None:
+            return
+        try:
+            if self._stream.is_active():
+                self._stream.stop_stream()
+            self._stream.close()
+        except Exception as e:
+            print(f"[capture] Error closing stream: {e}")
+        self._stream = None
+        self._mic_index = None
+        self._recording = False
+        self._data_ready.set()
+
+    # ------------------------------------------------------------------
+    # PortAudio callback (runs on the PortAudio thread; must not block)
+    # ------------------------------------------------------------------
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        if status & pyaudio.paInputUnderflow:
+            self.underruns += 1
+        with self._ring_lock:
+            if self._recording:
+                if len(self._queue) < self._queue_limit:
+                    self._queue.append(in_data)
+                    if self._first_chunk_at is None:
+                        self._first_chunk_at = time.perf_counter()
+                else:
+                    self.dropped += 1
+                self._data_ready.set()
+            else:
+                self.preroll.write(in_data)
+        return None, pyaudio.paContinue
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def start(self, mic_index):
+        """
+        Make sure the stream is open for mic_index and start queueing audio.
+        Returns the pre-roll bytes captured just before this call (b"" if disabled).
+        """
+        self.prepare(mic_index)
+        self._first_chunk_at = None
+        self._queue.clear()
+        self._data_ready.clear()
+
+        with self._ring_lock:
+            preroll = self.preroll.getvalue()
+            self.preroll.clear()
+            self._recording = True
+
+        if not self._stream.is_active():
+            self._stream.start_stream()
+
+        self._converter.reset()
+        preroll = self._converter.process(preroll)
+        self._last_preroll_len = len(preroll)
+        return preroll
+
+    def read(self, timeout=0.1):
+        """Return the next queued chunk of 16-bit PCM, or None if none arrived within timeout."""
+        while True:
+            try:
+                return self._converter.process(self._queue.popleft())
+            except IndexError:
+                pass
+            if not self._recording or not self._data_ready.wait(timeout):
+                return None
+            self._data_ready.clear()
+
+    def stop(self):
+        """
+        End the recording but keep the device open (and pre-roll armed).
+        Returns any chunks that were queued but not yet read.
+        """
+        with self._ring_lock:
+            self._recording = False
+        self._data_ready.set()
+        if not self.preroll.capacity and self._stream is not None and self._stream.is_active():
+            self._stream.stop_stream()
+        remaining = [self._converter.process(data) for data in self._queue]
+        self._queue.clear()
+        self.convert_time = self._converter.busy
+        if self.converting:
+            print(f"[capture] Converted {self.device_rate} Hz x{self.device_channels} → "
+                  f"{self.rate} Hz x{self.channels} in {self.convert_time * 1000:.1f} ms")
+        return remaining
+
+    def first_sample_delay(self, pressed_at):
+        """
+        Seconds from pressed_at (a time.perf_counter() value) to the first
+        live sample captured after the press, or None if nothing has been
+        captured yet. The first sample is taken to be one chunk-duration
+        before its callback fired. Pre-roll is not counted here (see
+        last_preroll_seconds), so this still shows what a warm stream saves.
+        """
+        if pressed_at is None or self._first_chunk_at is None:
+            return None
+        return max(0.0, self._first_chunk_at - self.chunk / self.rate - pressed_at)
+
+    @property
+    def last_preroll_seconds(self):
+        """Seconds of audio from before the press that the last start() returned."""
+        return self._last_preroll_len / self.bytes_per_second
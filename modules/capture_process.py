@@ -0,0 +1,369 @@
+"""
+voice_type_capture_process.py - Microphone capture in a dedicated subprocess.
+
+ProcessCaptureEngine runs the PortAudio stream in a spawned child process
+that writes into a multiprocessing.shared_memory ring, so stalls in the GUI
+process cannot make the device overflow.
+"""
+
+import contextlib
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import pyaudio
+
+from .capture import CaptureEngine, open_input
+from .core import SAMPLE_RATE
+from .resample import Resampler
+
+
+# Header fields (int64 each). The child is the only writer: it copies a chunk
+# into the data area, then advances WRITE_POS; the reader keeps its own position.
+WRITE_POS, OVERFLOWS, UNDERRUNS, CAPACITY, RATE, CHANNELS, FRAMES = range(7)
+HEADER_FIELDS = 8
+HEADER_SIZE = HEADER_FIELDS * 8
+
+# Shared block sized for the largest common native format: 48 kHz stereo.
+MAX_BYTES_PER_SECOND = 48000 * 2 * 2
+
+
+def _raise_priority():
+    """Best effort: above-normal scheduling for the capture process."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            HIGH_PRIORITY_CLASS = 0x80
+            if not kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), HIGH_PRIORITY_CLASS):
+                raise OSError("SetPriorityClass failed")
+        else:
+            os.nice(-10)
+        print("[capture] Capture process running at raised priority")
+    except (OSError, AttributeError) as e:
+        print(f"[capture] Could not raise capture process priority: {e}")
+
+
+def _attach(name):
+    """
+    Attach to the parent's block. Before Python 3.13 attaching also registers
+    it with the resource tracker, which a spawned child shares with the
+    parent, so the registration is a no-op and the parent's unlink clears it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        return shared_memory.SharedMemory(name=name)
+
+
+@contextlib.contextmanager
+def _main_hidden():
+    """
+    Hide the __main__ script from multiprocessing while a child is spawned.
+    Spawn re-runs the parent's main script in the child (as __mp_main__),
+    which here would load the whole app; _capture_main only needs this module.
+    """
+    main = sys.modules["__main__"]
+    saved = {name: main.__dict__[name] for name in ("__file__", "__spec__") if name in main.__dict__}
+    main.__dict__.pop("__file__", None)
+    main.__spec__ = None
+    try:
+        yield
+    finally:
+        main.__dict__.update(saved)
+
+
+def _capture_main(conn, shm_name, data_ready, high_priority):
+    """Child process: serve open/start/stop/close commands and fill the ring."""
+    if high_priority:
+        _raise_priority()
+    shm = _attach(shm_name)
+    header = shm.buf[:HEADER_SIZE].cast("q")
+    data = shm.buf[HEADER_SIZE:]
+    pa = pyaudio.PyAudio()
+    stream = None
+
+    def on_audio(in_data, frame_count, time_info, status):
+        if status & pyaudio.paInputOverflow:
+            header[OVERFLOWS] += 1
+        if status & pyaudio.paInputUnderflow:
+            header[UNDERRUNS] += 1
+        capacity = header[CAPACITY]
+        pos = header[WRITE_POS]
+        n = len(in_data)
+        off = pos % capacity
+        first = min(n, capacity - off)
+        view = memoryview(in_data)
+        data[off:off + first] = view[:first]
+        if first < n:
+            data[:n - first] = view[first:]
+        header[WRITE_POS] = pos + n
+        data_ready.set()
+        return None, pyaudio.paContinue
+
+    def close_stream():
+        nonlocal stream
+        if stream is not None:
+            if stream.is_active():
+                stream.stop_stream()
+            stream.close()
+            stream = None
+
+    try:
+        while True:
+            cmd, *args = conn.recv()
+            try:
+                if cmd == "open":
+                    mic_idx, rate, channels, chunk = args
+                    close_stream()
+                    stream, dev_rate, dev_channels, frames = open_input(
+                        pa, mic_idx, rate, channels, chunk, on_audio,
+                    )
+                    chunk_bytes = frames * dev_channels * 2
+                    header[WRITE_POS] = 0
+                    header[CAPACITY] = len(data) - len(data) % chunk_bytes
+                    header[RATE], header[CHANNELS], header[FRAMES] = dev_rate, dev_channels, frames
+                elif cmd == "start":
+                    if not stream.is_active():
+                        stream.start_stream()
+                elif cmd == "stop":
+                    if stream.is_active():
+                        stream.stop_stream()
+                elif cmd == "close":
+                    close_stream()
+                elif cmd == "quit":
+                    break
+                conn.send(("ok", None))
+            except Exception as e:
+                conn.send(("error", str(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        close_stream()
+        pa.terminate()
+        header.release()
+        data.release()
+        shm.close()
+
+
+class ProcessCaptureEngine(CaptureEngine):
+    """CaptureEngine whose stream lives in a child process; same interface."""
+
+    def __init__(self, rate=SAMPLE_RATE, chunk=1024, channels=1, preroll=0.0,
+                 max_queue_seconds=10.0, high_priority=False):
+        self.high_priority = high_priority
+        self._ctx = multiprocessing.get_context("spawn")
+        self._proc = None
+        self._conn = None
+        self._shm = None
+        self._header = None
+        self._ring = None
+        self._read_pos = 0
+        self._chunk_bytes = 0
+        self._streaming = False
+        self._counters_base = (0, 0)
+        super().__init__(rate, chunk, channels, preroll, max_queue_seconds)
+        self._data_ready = self._ctx.Event()
+
+    # ------------------------------------------------------------------
+    # Child process
+    # ------------------------------------------------------------------
+
+    def _ensure_process(self):
+        if self._proc is not None and self._proc.is_alive():
+            return
+        self._stop_process()
+        size = HEADER_SIZE + int(self._max_queue_seconds * MAX_BYTES_PER_SECOND)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._header = self._shm.buf[:HEADER_SIZE].cast("q")
+        self._ring = self._shm.buf[HEADER_SIZE:]
+        self._conn, child_conn = self._ctx.Pipe()
+        self._proc = self._ctx.Process(
+            target=_capture_main, name="voice-type-capture", daemon=True,
+            args=(child_conn, self._shm.name, self._data_ready, self.high_priority),
+        )
+        with _main_hidden():
+            self._proc.start()
+        child_conn.close()
+        print(f"[capture] Started capture process (pid {self._proc.pid})")
+
+    def _call(self, cmd, *args, timeout=10.0):
+        self._conn.send((cmd, *args))
+        if not self._conn.poll(timeout):
+            raise TimeoutError(f"capture process did not answer {cmd!r}")
+        status, value = self._conn.recv()
+        if status == "error":
+            raise RuntimeError(value)
+        return value
+
+    def _stop_process(self):
+        if self._proc is not None:
+            try:
+                if self._proc.is_alive():
+                    self._conn.send(("quit",))
+                    self._proc.join(2.0)
+            except (OSError, EOFError):
+                pass
+            if self._proc.is_alive():
+                self._proc.terminate()
+            self._proc = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._shm is not None:
+            self._sync_counters()
+            self._counters_base = (self.overflows, self.underruns)
+            self._header.release()
+            self._ring.release()
+            self._header = self._ring = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def _sync_counters(self):
+        if self._header is not None:
+            self.overflows = self._counters_base[0] + self._header[OVERFLOWS]
+            self.underruns = self._counters_base[1] + self._header[UNDERRUNS]
+
+    # ------------------------------------------------------------------
+    # Device lifecycle
+    # ------------------------------------------------------------------
+
+    def prepare(self, mic_index):
+        mic_idx = mic_index if mic_index is not None else 0
+        with self._lock:
+            if self._stream is not None and mic_idx == self._mic_index and self._proc.is_alive():
+                return
+            self._close_stream()
+            self._ensure_process()
+            t0 = time.perf_counter()
+            self._call("open", mic_idx, self.rate, self.channels, self.chunk)
+            self.device_rate = self._header[RATE]
+            self.device_channels = self._header[CHANNELS]
+            self._chunk_bytes = self._header[FRAMES] * self.device_channels * self.sample_width
+            self._converter = Resampler(self.device_rate, self.device_channels, self.rate, self.channels)
+            self._stream = mic_idx   # marker: a stream is open in the child
+            self._mic_index = mic_idx
+            self._read_pos = 0
+            print(f"[capture] Opened device {mic_idx} at {self.device_rate} Hz "
+                  f"x{self.device_channels} in the capture process "
+                  f"in {(time.perf_counter() - t0) * 1000:.0f} ms")
+            if self.preroll_seconds:
+                self._call("start")
+                self._streaming = True
+
+    def close(self):
+        with self._lock:
+            self._close_stream()
+            self._stop_process()
+
+    def _close_stream(self):
+        if self._stream is None:
+            return
+        try:
+            if self._proc is not None and self._proc.is_alive():
+                self._call("close")
+        except Exception as e:
+            print(f"[capture] Error closing stream: {e}")
+        self._stream = None
+        self._mic_index = None
+        self._streaming = False
+        self._recording = False
+        self._data_ready.set()
+
+    # ------------------------------------------------------------------
+    # Ring reader
+    # ------------------------------------------------------------------
+
+    def _take(self):
+        """Next chunk from the ring as a view (a copy if it wraps), or None."""
+        capacity = self._header[CAPACITY]
+        avail = self._header[WRITE_POS] - self._read_pos
+        # Keep one chunk of distance from the writer, which may be mid-copy.
+        limit = capacity - self._chunk_bytes
+        if avail > limit:
+            behind = avail - limit
+            skip = -(-behind // self._chunk_bytes) * self._chunk_bytes
+            self.dropped += skip // self._chunk_bytes
+            self._read_pos += skip
+            avail -= skip
+        if avail < self._chunk_bytes:
+            return None
+        off = self._read_pos % capacity
+        end = off + self._chunk_bytes
+        self._read_pos += self._chunk_bytes
+        if end <= capacity:
+            return self._ring[off:end]
+        return bytes(self._ring[off:capacity]) + bytes(self._ring[:end - capacity])
+
+    def _convert(self, chunk):
+        out = self._converter.process(chunk)
+        return bytes(out) if out is chunk else out  # never hand out views of the ring
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def start(self, mic_index):
+        self.prepare(mic_index)
+        self._first_chunk_at = None
+        self._data_ready.clear()
+        self._converter.reset()
+
+        write_pos = self._header[WRITE_POS]
+        preroll_bytes = int(self.preroll_seconds * self.device_rate) * self.device_channels * self.sample_width
+        preroll_bytes = min(preroll_bytes, write_pos, self._header[CAPACITY] - self._chunk_bytes)
+        preroll_bytes -= preroll_bytes % (self.device_channels * self.sample_width)
+        start = write_pos - preroll_bytes
+        capacity = self._header[CAPACITY]
+        off = start % capacity
+        if off + preroll_bytes <= capacity:
+            raw = bytes(self._ring[off:off + preroll_bytes])
+        else:
+            raw = bytes(self._ring[off:capacity]) + bytes(self._ring[:off + preroll_bytes - capacity])
+        self._read_pos = write_pos
+        self._recording = True
+
+        if not self._streaming:
+            self._call("start")
+            self._streaming = True
+
+        preroll = self._converter.process(raw)
+        self._last_preroll_len = len(preroll)
+        return preroll
+
+    def read(self, timeout=0.1):
+        while True:
+            chunk = self._take()
+            if chunk is not None:
+                if self._first_chunk_at is None:
+                    self._first_chunk_at = time.perf_counter()
+                return self._convert(chunk)
+            if not self._proc.is_alive():
+                raise RuntimeError("capture process exited")
+            if not self._recording or not self._data_ready.wait(timeout):
+                return None
+            self._data_ready.clear()
+
+    def stop(self):
+        self._recording = False
+        remaining = []
+        while self._header is not None:
+            chunk = self._take()
+            if chunk is None:
+                break
+            remaining.append(self._convert(chunk))
+        if not self.preroll_seconds and self._streaming:
+            try:
+                self._call("stop")
+            except Exception as e:
+                print(f"[capture] Error stopping stream: {e}")
+            self._streaming = False
+        self._sync_counters()
+        self.convert_time = self._converter.busy
+        if self.converting:
+            print(f"[capture] Converted {self.device_rate} Hz x{self.device_channels} → "
+                  f"{self.rate} Hz x{self.channels} in {self.convert_time * 1000:.1f} ms")
+        return remaining
@@ -9,15 +9,18 @@ import json
 import re
 from pathlib import Path
 
-import httpx
-
 
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
 
 CONFIG_FILE = Path.home() / ".voice-type-config.json"
+SPOOL_DIR = Path.home() / ".voice-type-spool"
+RECORDINGS_DIR = Path.home() / "VoiceType Recordings"
+MEETINGS_DIR = Path.home() / "VoiceType Meetings"
 SAMPLE_RATE = 16000
+GROQ_TRANSCRIPTIONS = "https://api.groq.com/openai/v1/audio/transcriptions"
+GROQ_MODEL = "whisper-large-v3-turbo"
 DEFAULT_FILTER_WORDS = ["thank you", "thanks", "thank you.", "thanks."]
 
 NUMBER_WORD_MAP = {
@@ -70,6 +73,7 @@ def load_config():
         "accounting_comma": False,
         "casual_mode": False,
         "filter_words": DEFAULT_FILTER_WORDS,
+        "pre_roll": 0.3,
     }
     if CONFIG_FILE.exists():
         try:
@@ -91,43 +95,21 @@ def save_config(config_data):
 # Transcription
 # ---------------------------------------------------------------------------
 
-def transcribe_with_groq(audio_path, api_key):
+def transcribe_with_groq(audio, api_key, client, audio_seconds=None):
     """
-    Transcribe audio via Groq Whisper API.
+    Transcribe audio via Groq Whisper API. `audio` is a file path or a
+    bytes-like WAV buffer, which is streamed without an intermediate copy.
+    The request runs on the shared ApiClient `client` (retries, timeout
+    scaled by audio_seconds) and this call blocks on the result.
     Returns (text, error_string). On success error is None.
     """
     if not api_key:
         return None, "No API key"
 
-    try:
-        url = "https://api.groq.com/openai/v1/audio/transcriptions"
-        headers = {"Authorization": f"Bearer {api_key}"}
-
-        with open(audio_path, "rb") as f:
-            audio_data = f.read()
-
-        files = {"file": ("audio.wav", audio_data, "audio/wav")}
-        data = {"model": "whisper-large-v3-turbo", "response_format": "json"}
-
-        with httpx.Client(timeout=30) as client:
-            response = client.post(url, headers=headers, files=files, data=data)
-
-        if response.status_code == 200:
-            return response.json().get("text"), None
-
-        error_msg = f"HTTP {response.status_code}"
-        try:
-            error_detail = response.json()
-            if "error" in error_detail:
-                error_msg += f": {error_detail['error'].get('message', str(error_detail['error']))}"
-        except Exception:
-            pass
-        print(f"[API] Error: {error_msg}")
-        return None, error_msg
-
-    except Exception as e:
-        print(f"[API] Exception: {e}")
-        return None, str(e)
+    text, error = client.submit(audio, api_key, audio_seconds=audio_seconds).result()
+    if error:
+        print(f"[API] Error: {error}")
+    return text, error
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,182 @@
+"""
+voice_type_devices.py - Cached input-device registry with hot-plug detection.
+
+DeviceRegistry enumerates input devices once, keys them by a stable
+"host API:name" string and watches an OS-level fingerprint for changes.
+"""
+
+import os
+import sys
+import threading
+
+import pyaudio
+
+
+class InputDevice:
+    """One PortAudio input device as seen by the last enumeration."""
+
+    def __init__(self, index, name, host_api, channels, rate):
+        self.index = index
+        self.name = name
+        self.host_api = host_api
+        self.channels = channels
+        self.rate = rate
+
+    @property
+    def key(self):
+        """Stable identity across re-enumerations (indices are not)."""
+        return f"{self.host_api}:{self.name}"
+
+    def __repr__(self):
+        return f"InputDevice({self.index}, {self.key!r})"
+
+
+def enumerate_inputs():
+    """
+    List input devices with a fresh PyAudio instance.
+    Returns (devices, default_index or None).
+    """
+    pa = pyaudio.PyAudio()
+    try:
+        apis = {}
+        for i in range(pa.get_host_api_count()):
+            apis[i] = pa.get_host_api_info_by_index(i)["name"]
+        devices = []
+        for i in range(pa.get_device_count()):
+            dev = pa.get_device_info_by_index(i)
+            if dev["maxInputChannels"] > 0:
+                devices.append(InputDevice(
+                    i, dev["name"], apis.get(dev["hostApi"], "?"),
+                    dev["maxInputChannels"], int(dev["defaultSampleRate"]),
+                ))
+        try:
+            default = pa.get_default_input_device_info()["index"]
+        except (IOError, OSError):
+            default = devices[0].index if devices else None
+        return devices, default
+    finally:
+        pa.terminate()
+
+
+def device_fingerprint():
+    """
+    Cheap snapshot of the OS audio-input device set, without PortAudio.
+    Returns None where no such source is available (no hot-plug detection).
+    """
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class WAVEINCAPSW(ctypes.Structure):
+            _fields_ = [
+                ("wMid", wintypes.WORD), ("wPid", wintypes.WORD),
+                ("vDriverVersion", wintypes.UINT), ("szPname", wintypes.WCHAR * 32),
+                ("dwFormats", wintypes.DWORD), ("wChannels", wintypes.WORD),
+                ("wReserved1", wintypes.WORD),
+            ]
+
+        winmm = ctypes.windll.winmm
+        names = []
+        for i in range(winmm.waveInGetNumDevs()):
+            caps = WAVEINCAPSW()
+            if winmm.waveInGetDevCapsW(i, ctypes.byref(caps), ctypes.sizeof(caps)) == 0:
+                names.append(caps.szPname)
+        return tuple(names)
+    if os.path.isdir("/dev/snd"):
+        return tuple(sorted(os.listdir("/dev/snd")))
+    return None
+
+
+class DeviceRegistry:
+    """Thread-safe cache of input devices; resolve() never touches PortAudio."""
+
+    def __init__(self, poll_interval=2.0):
+        self.poll_interval = poll_interval
+        self._devices = []
+        self._default = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._fingerprint = None
+        self.ready = False      # True after the first successful enumeration
+        self.watching = False
+        self.hotplug = None     # None until watch() has checked for a hot-plug source
+
+    @property
+    def devices(self):
+        with self._lock:
+            return list(self._devices)
+
+    def refresh(self):
+        """Re-enumerate. PortAudio only rescans if no other PyAudio instance is alive."""
+        try:
+            devices, default = enumerate_inputs()
+        except Exception as e:
+            print(f"[devices] Enumeration failed: {e}")
+            return False
+        with self._lock:
+            self._devices = devices
+            self._default = default
+            self.ready = True
+        self._fingerprint = device_fingerprint()
+        print(f"[devices] {len(devices)} input devices")
+        return True
+
+    def find(self, key):
+        with self._lock:
+            for dev in self._devices:
+                if dev.key == key:
+                    return dev
+        return None
+
+    def resolve(self, key, index=None):
+        """
+        Current index for a saved device key, or for a bare index from an older
+        config. Falls back to the default input device rather than index 0.
+        Before the first enumeration the index is returned unchanged.
+        """
+        if not self.ready:
+            return index
+        dev = self.find(key) if key else None
+        if dev is not None:
+            return dev.index
+        with self._lock:
+            if key is None and index is not None and any(d.index == index for d in self._devices):
+                return index
+            if key:
+                print(f"[devices] {key} is not connected, using the default input")
+            return self._default
+
+    def key_for(self, index):
+        with self._lock:
+            for dev in self._devices:
+                if dev.index == index:
+                    return dev.key
+        return None
+
+    def watch(self, on_change):
+        """
+        Poll the OS fingerprint on a daemon thread and call on_change() when
+        it moves. on_change returns False to be called again on the next poll
+        (e.g. while a recording is running).
+        """
+        if self._fingerprint is None and device_fingerprint() is None:
+            print("[devices] No hot-plug source on this platform; devices refresh when settings open")
+            self.hotplug = False
+            return
+        self.hotplug = True
+        self.watching = True
+
+        def loop():
+            while not self._stop.wait(self.poll_interval):
+                try:
+                    current = device_fingerprint()
+                except Exception as e:
+                    print(f"[devices] Fingerprint failed: {e}")
+                    continue
+                if current != self._fingerprint and on_change() is not False:
+                    self._fingerprint = current
+
+        threading.Thread(target=loop, name="device-watch", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
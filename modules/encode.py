@@ -0,0 +1,465 @@
+"""
+voice_type_encode.py - In-memory audio buffers and upload payloads for Voice Type.
+
+PcmBuffer becomes a WAV without copying, SpoolBuffer spills long recordings
+to a recoverable file, Encoder compresses uploads (FLAC/Opus via soundfile)
+and BufferReader streams any buffer into an httpx upload.
+"""
+
+import gc
+import io
+import mmap
+import mimetypes
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import soundfile
+except (ImportError, OSError):  # OSError: libsndfile missing
+    soundfile = None
+
+
+WAV_HEADER_SIZE = 44
+WAV_HEADER_FORMAT = "<4sI4s4sIHHIIHH4sI"
+SPOOL_UNFINISHED = 0xFFFFFFFF  # data size in a spool header while recording
+
+# codec -> (upload filename, content type, soundfile format, soundfile subtype)
+UPLOAD_CODECS = {
+    "wav":  ("audio.wav",  "audio/wav",  None,   None),
+    "flac": ("audio.flac", "audio/flac", "FLAC", "PCM_16"),
+    "opus": ("audio.ogg",  "audio/ogg",  "OGG",  "OPUS"),
+}
+
+
+# ---------------------------------------------------------------------------
+# PCM / WAV buffer
+# ---------------------------------------------------------------------------
+
+class PcmBuffer:
+    """
+    Growable 16-bit PCM buffer that becomes a WAV file without copying.
+
+    trim() narrows the buffer to a sub-range; wav() then writes the header
+    into the 44 bytes just before the kept audio, which are always either the
+    reserved header slot or discarded lead-in, so trimming is also zero-copy.
+    """
+
+    def __init__(self, rate, channels=1, sample_width=2):
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self._buf = bytearray(WAV_HEADER_SIZE)
+        self._start = 0     # first kept PCM byte, relative to the header slot
+        self._end = None    # absolute end offset once trimmed
+
+    def extend(self, data):
+        """Append PCM bytes. Not allowed after trim() or once wav()/pcm() views are held."""
+        self._buf += data
+
+    def _stop(self):
+        return len(self._buf) if self._end is None else self._end
+
+    def __len__(self):
+        return self._stop() - WAV_HEADER_SIZE - self._start
+
+    @property
+    def block_align(self):
+        return self.channels * self.sample_width
+
+    @property
+    def duration(self):
+        """Length of the buffered audio in seconds."""
+        return len(self) / (self.rate * self.block_align)
+
+    def _data(self):
+        """The object holding header slot + PCM (a bytearray here)."""
+        return self._buf
+
+    def pcm(self):
+        """Zero-copy view of the raw PCM samples."""
+        return memoryview(self._data())[WAV_HEADER_SIZE + self._start:self._stop()]
+
+    def trim(self, start, end):
+        """Keep only PCM bytes [start, end) of the current pcm() range."""
+        base = self._start
+        self._end = WAV_HEADER_SIZE + base + end
+        self._start = base + start
+
+    def wav(self):
+        """Write the RIFF/WAVE header in place and return a zero-copy view of the whole file."""
+        data = self._data()
+        _pack_wav_header(data, self._start, len(self), self.rate, self.channels, self.sample_width)
+        return memoryview(data)[self._start:self._stop()]
+
+    def close(self):
+        """Release the buffer's storage (a no-op for in-RAM buffers)."""
+
+
+def _pack_wav_header(buf, offset, n, rate, channels, sample_width):
+    block_align = channels * sample_width
+    riff_size = SPOOL_UNFINISHED if n == SPOOL_UNFINISHED else 36 + n
+    struct.pack_into(
+        WAV_HEADER_FORMAT, buf, offset,
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16, 1, channels, rate,
+        rate * block_align, block_align, sample_width * 8,
+        b"data", n,
+    )
+
+
+class SpoolBuffer(PcmBuffer):
+    """
+    PcmBuffer that keeps at most ram_seconds of audio in memory.
+
+    Beyond that the audio so far moves to spool_dir/spool_*.wav and later
+    chunks are appended with unbuffered writes, so the file is always as
+    complete as the recording. pcm()/wav() map the file and return views of
+    the map, which encoding and upload read without copying. close() unmaps
+    and deletes the file; if the process dies first, recover_spool() finds it.
+    """
+
+    def __init__(self, rate, channels=1, sample_width=2, spool_dir=None, ram_seconds=30.0):
+        super().__init__(rate, channels, sample_width)
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+        self.ram_limit = int(ram_seconds * rate) * self.block_align
+        self.path = None
+        self._file = None
+        self._map = None
+        self._size = 0   # header + PCM bytes in the spool file
+
+    @property
+    def spooled(self):
+        return self._file is not None
+
+    def extend(self, data):
+        if self._file is None:
+            self._buf += data
+            if self.spool_dir and len(self._buf) - WAV_HEADER_SIZE > self.ram_limit:
+                self._spill()
+            return
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.write(data)
+        self._size += len(data)
+
+    def _spill(self):
+        try:
+            self.spool_dir.mkdir(exist_ok=True)
+            # Unique even when several buffers (meeting mics) spill in the same second.
+            fd, path = tempfile.mkstemp(
+                prefix=f"spool_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_",
+                suffix=".wav", dir=self.spool_dir,
+            )
+            path = Path(path)
+            f = open(fd, "w+b", buffering=0)
+        except OSError as e:
+            print(f"[spool] Cannot spill to disk, keeping audio in memory: {e}")
+            self.spool_dir = None
+            return
+        _pack_wav_header(self._buf, 0, SPOOL_UNFINISHED, self.rate, self.channels, self.sample_width)
+        f.write(self._buf)
+        self._size = len(self._buf)
+        self._buf = bytearray()
+        self._file = f
+        self.path = path
+        print(f"[spool] Recording passed {self.ram_limit / self.block_align / self.rate:g}s, "
+              f"spilling to {path}")
+
+    def _data(self):
+        if self._file is None:
+            return self._buf
+        if self._map is None:
+            self._map = mmap.mmap(self._file.fileno(), self._size)
+        return self._map
+
+    def _stop(self):
+        if self._file is None:
+            return super()._stop()
+        return self._size if self._end is None else self._end
+
+    def close(self):
+        """Unmap and delete the spool file (callers must have dropped their views)."""
+        if self._file is None:
+            return
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:  # a view is still referenced from a cycle
+                gc.collect()
+                try:
+                    self._map.close()
+                except BufferError:
+                    pass
+            self._map = None
+        self._file.close()
+        self._file = None
+        try:
+            self.path.unlink()
+        except OSError as e:
+            print(f"[spool] Could not remove {self.path}: {e}")
+
+
+def _pid_alive(pid):
+    """Whether a process with this pid is running (True when unsure)."""
+    if pid == os.getpid():
+        return True
+    if sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        PROCESS_QUERY_LIMITED_INFORMATION, STILL_ACTIVE = 0x1000, 259
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return ctypes.GetLastError() == 5   # access denied: it exists
+        try:
+            code = ctypes.c_ulong()
+            return not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)) or code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:   # e.g. PermissionError: someone else's process
+        pass
+    return True
+
+
+def recover_spool(spool_dir, dest_dir):
+    """
+    Turn spool files left behind by a crash into ordinary WAVs in dest_dir.
+    The header is completed from the file size. Files whose writer (the pid
+    in the name) is still running belong to a live recording and are left
+    alone. Returns the recovered paths.
+    """
+    spool_dir = Path(spool_dir)
+    if not spool_dir.is_dir():
+        return []
+    recovered = []
+    for path in sorted(spool_dir.glob("spool_*.wav")):
+        pid = path.stem.split("_")[3:4]   # spool_<date>_<time>_<pid>_<random>
+        if pid and pid[0].isdigit() and _pid_alive(int(pid[0])):
+            continue
+        try:
+            with open(path, "r+b") as f:
+                header = f.read(WAV_HEADER_SIZE)
+                fields = struct.unpack(WAV_HEADER_FORMAT, header)
+                channels, rate, block_align, bits = fields[6], fields[7], fields[9], fields[10]
+                size = os.fstat(f.fileno()).st_size - WAV_HEADER_SIZE
+                size -= size % max(1, block_align)
+                f.truncate(WAV_HEADER_SIZE + size)
+                fixed = bytearray(WAV_HEADER_SIZE)
+                _pack_wav_header(fixed, 0, size, rate, channels, bits // 8)
+                f.seek(0)
+                f.write(fixed)
+            Path(dest_dir).mkdir(exist_ok=True)
+            target = Path(dest_dir) / f"recovered_{path.stem[len('spool_'):]}.wav"
+            shutil.move(str(path), str(target))
+            recovered.append(target)
+            print(f"[spool] Recovered unfinished recording ({size / (rate * block_align):.0f}s): {target}")
+        except (OSError, struct.error) as e:
+            print(f"[spool] Could not recover {path.name}: {e}")
+    return recovered
+
+
+def load_pcm(path):
+    """
+    Decode an audio file into a 16-bit PcmBuffer at its native rate/channels.
+    WAV is read with the stdlib; other formats need soundfile. Returns None
+    if the file cannot be decoded here.
+    """
+    path = Path(path)
+    try:
+        if path.suffix.lower() == ".wav":
+            with wave.open(str(path), "rb") as wf:
+                if wf.getsampwidth() != 2:
+                    return None
+                buf = PcmBuffer(wf.getframerate(), wf.getnchannels())
+                buf.extend(wf.readframes(wf.getnframes()))
+                return buf
+        if soundfile is not None:
+            with soundfile.SoundFile(str(path)) as f:
+                buf = PcmBuffer(f.samplerate, f.channels)
+                buf.extend(f.buffer_read(dtype="int16"))
+                return buf
+    except Exception as e:
+        print(f"[encode] Could not decode {path.name}: {e}")
+    return None
+
+
+def audio_duration(path, min_bitrate=32000):
+    """
+    Duration of an audio file in seconds, read from its header (stdlib for
+    WAV, soundfile otherwise). Formats neither can read are estimated from
+    the file size at min_bitrate bits/s, which errs on the long side.
+    """
+    path = Path(path)
+    try:
+        if path.suffix.lower() == ".wav":
+            with wave.open(str(path), "rb") as wf:
+                return wf.getnframes() / wf.getframerate()
+        if soundfile is not None:
+            info = soundfile.info(str(path))
+            if info.samplerate and info.frames:
+                return info.frames / info.samplerate
+    except Exception:
+        pass
+    try:
+        return path.stat().st_size * 8 / min_bitrate
+    except OSError:
+        return None
+
+
+def save_wav(wav_view, directory, prefix="recording"):
+    """Write a finished WAV view to disk (only used when save_audio is on)."""
+    directory = Path(directory)
+    directory.mkdir(exist_ok=True)
+    path = directory / f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}.wav"
+    path.write_bytes(wav_view)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Upload codecs
+# ---------------------------------------------------------------------------
+
+class EncodedAudio:
+    """An upload-ready payload plus what it cost to produce."""
+
+    def __init__(self, codec, payload, raw_size, encode_time):
+        self.codec = codec
+        self.payload = payload
+        self.filename, self.content_type = UPLOAD_CODECS[codec][:2]
+        self.raw_size = raw_size
+        self.encode_time = encode_time
+
+    @property
+    def size(self):
+        return len(self.payload)
+
+
+def available_codecs():
+    """Codecs that can actually be produced in this environment."""
+    if soundfile is None:
+        return ["wav"]
+    formats = soundfile.available_formats()
+    subtypes = {fmt: soundfile.available_subtypes(fmt) for fmt in ("FLAC", "OGG") if fmt in formats}
+    codecs = ["wav"]
+    for codec, (_name, _ctype, fmt, subtype) in UPLOAD_CODECS.items():
+        if fmt and subtype in subtypes.get(fmt, {}):
+            codecs.append(codec)
+    return codecs
+
+
+def encode_audio(pcm_buffer, codec="wav"):
+    """
+    Encode a PcmBuffer for upload. Returns an EncodedAudio; falls back to the
+    in-place WAV view if the codec is unknown or soundfile cannot produce it.
+    """
+    t0 = time.perf_counter()
+    raw_size = len(pcm_buffer) + WAV_HEADER_SIZE
+    fmt, subtype = UPLOAD_CODECS.get(codec, (None, None, None, None))[2:]
+
+    if fmt and soundfile is not None:
+        try:
+            out = io.BytesIO()
+            with soundfile.SoundFile(
+                out, mode="w", samplerate=pcm_buffer.rate,
+                channels=pcm_buffer.channels, format=fmt, subtype=subtype,
+            ) as f:
+                f.buffer_write(pcm_buffer.pcm(), dtype="int16")
+            return EncodedAudio(codec, out.getbuffer(), raw_size, time.perf_counter() - t0)
+        except Exception as e:
+            print(f"[encode] {codec} failed, sending WAV: {e}")
+    elif fmt:
+        print(f"[encode] soundfile not installed, sending WAV instead of {codec}")
+
+    return EncodedAudio("wav", pcm_buffer.wav(), raw_size, time.perf_counter() - t0)
+
+
+class Encoder:
+    """Single worker thread that encodes finished recordings off the capture path."""
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encode")
+
+    def submit(self, pcm_buffer, codec="wav"):
+        """Queue pcm_buffer for encoding; returns a Future[EncodedAudio]."""
+        return self._pool.submit(encode_audio, pcm_buffer, codec)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+# ---------------------------------------------------------------------------
+# Upload helpers
+# ---------------------------------------------------------------------------
+
+class BufferReader(io.RawIOBase):
+    """
+    Read-only, seekable file object over a bytes-like buffer.
+
+    httpx reads multipart file parts in 64 KB chunks via read(); each chunk is
+    copied from the shared buffer once, straight into the request body.
+    """
+
+    def __init__(self, data):
+        super().__init__()
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        if not self.closed:
+            self._view.release()  # so a memory-mapped source can be unmapped
+        super().close()
+
+    def readinto(self, b):
+        n = min(len(b), len(self._view) - self._pos)
+        if n <= 0:
+            return 0
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        self._pos = max(0, pos)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def __len__(self):
+        return len(self._view)
+
+
+def upload_file(audio, filename="audio.wav", content_type="audio/wav"):
+    """
+    Return an httpx `files` tuple for audio, which may be a path or a bytes-like
+    buffer. Paths are opened (caller must close the returned file object);
+    buffers are wrapped in a BufferReader.
+    """
+    if isinstance(audio, (str, Path)):
+        guessed = mimetypes.guess_type(str(audio))[0]
+        return (Path(audio).name, open(audio, "rb"), guessed or content_type)
+    return (filename, BufferReader(audio), content_type)
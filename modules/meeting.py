@@ -0,0 +1,58 @@
+"""
+voice_type_meeting.py - Transcript file for long-form meeting recordings.
+
+Segment texts are appended with their start offsets (and source mic) as they
+are transcribed; failed segments keep their audio next to the transcript.
+"""
+
+import time
+from pathlib import Path
+
+
+def format_offset(seconds):
+    """Meeting offset as H:MM:SS."""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class MeetingTranscript:
+    """Append-only transcript file; every line is flushed as soon as it is written."""
+
+    def __init__(self, directory):
+        directory = Path(directory)
+        directory.mkdir(exist_ok=True)
+        self.started = time.time()
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.started))
+        self.path = directory / f"meeting_{stamp}.txt"
+        self.audio_dir = directory / f"meeting_{stamp}"
+        self.segments = 0
+        self.failed = 0
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._write(f"Meeting {time.strftime('%Y-%m-%d %H:%M', time.localtime(self.started))}\n\n")
+
+    def _write(self, line):
+        self._file.write(line)
+        self._file.flush()
+
+    def append(self, offset, text, source=None):
+        """Add one segment's text, stamped with its start offset in seconds and its mic."""
+        self.segments += 1
+        self._write(f"{self._stamp(offset, source)} {text.strip()}\n")
+
+    def append_failure(self, offset, error, source=None):
+        self.failed += 1
+        self._write(f"{self._stamp(offset, source)} [not transcribed: {error}]\n")
+
+    @staticmethod
+    def _stamp(offset, source):
+        stamp = f"[{format_offset(offset)}]"
+        return f"{stamp} {source}:" if source else stamp
+
+    def close(self, duration):
+        if self._file.closed:
+            return
+        summary = f"{self.segments} segments"
+        if self.failed:
+            summary += f", {self.failed} failed (audio in {self.audio_dir.name})"
+        self._write(f"\nEnded after {format_offset(duration)} ({summary})\n")
+        self._file.close()
@@ -0,0 +1,94 @@
+"""
+voice_type_metering.py - Level metering for 16-bit PCM chunks.
+
+Peak, RMS and dBFS over a zero-copy view of the chunk, using NumPy, audioop
+or a memoryview cast, whichever is available.
+"""
+
+import math
+import operator
+import warnings
+
+try:
+    import numpy as np
+except ImportError:  # Lite builds may ship without NumPy
+    np = None
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:  # removed in Python 3.13
+    audioop = None
+
+
+FULL_SCALE = 32768.0
+SILENCE_DBFS = -96.0
+
+
+def _samples(data):
+    """Zero-copy int16 view of a PCM chunk (odd trailing byte ignored)."""
+    usable = len(data) - (len(data) % 2)
+    if np is not None:
+        return np.frombuffer(data, dtype="<i2", count=usable // 2)
+    return memoryview(data)[:usable].cast("h")
+
+
+def peak(data):
+    """Peak absolute sample level of a chunk, normalised to 0.0–1.0."""
+    if np is None and audioop is not None:
+        usable = len(data) - (len(data) % 2)
+        return min(audioop.max(memoryview(data)[:usable], 2) / FULL_SCALE, 1.0)
+    samples = _samples(data)
+    if not len(samples):
+        return 0.0
+    if np is not None:
+        hi, lo = int(samples.max()), int(samples.min())
+    else:
+        hi, lo = max(samples), min(samples)
+    return min(max(hi, -lo) / FULL_SCALE, 1.0)
+
+
+def rms(data):
+    """Root-mean-square level of a chunk, normalised to 0.0–1.0."""
+    if np is None and audioop is not None:
+        usable = len(data) - (len(data) % 2)
+        return audioop.rms(memoryview(data)[:usable], 2) / FULL_SCALE
+    samples = _samples(data)
+    n = len(samples)
+    if not n:
+        return 0.0
+    if np is not None:
+        f = samples.astype(np.float32)
+        total = float(np.dot(f, f))
+    else:
+        total = sum(map(operator.mul, samples, samples))
+    return math.sqrt(total / n) / FULL_SCALE
+
+
+def frame_rms(data, frame_samples):
+    """
+    RMS level (0.0–1.0) of each consecutive frame of frame_samples samples;
+    a trailing partial frame is ignored.
+    """
+    n = (len(data) // 2) // frame_samples
+    if not n:
+        return []
+    if np is not None:
+        frames = _samples(data)[:n * frame_samples].astype(np.float32).reshape(n, frame_samples)
+        return (np.sqrt((frames * frames).mean(axis=1)) / FULL_SCALE).tolist()
+    view = memoryview(data)
+    step = frame_samples * 2
+    return [rms(view[i * step:(i + 1) * step]) for i in range(n)]
+
+
+def measure(data):
+    """Return (peak, rms) for a chunk in one call."""
+    return peak(data), rms(data)
+
+
+def to_dbfs(level):
+    """Convert a normalised 0.0–1.0 level to dBFS (floored at SILENCE_DBFS)."""
+    if level <= 0.0:
+        return SILENCE_DBFS
+    return max(SILENCE_DBFS, 20.0 * math.log10(level))
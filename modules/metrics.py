@@ -0,0 +1,69 @@
+"""
+voice_type_metrics.py - In-process latency and counter metrics for Voice Type.
+
+Thread-safe counters plus bounded sample windows summarised as
+count/mean/p50/p90/p99. Nothing here is persisted; long-term totals live in STATS.
+"""
+
+import threading
+from collections import defaultdict, deque
+
+
+class Metrics:
+    """Thread-safe counters and rolling sample windows."""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._counters = defaultdict(int)
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def count(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def observe(self, name, value):
+        with self._lock:
+            self._samples[name].append(value)
+
+    def percentile(self, name, pct):
+        """Return the pct-th percentile of recent samples, or None if empty."""
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if not samples:
+            return None
+        idx = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[idx]
+
+    def summary(self, name):
+        """Return {count, mean, p50, p90, p99} for a sample window (empty dict if none)."""
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        if not samples:
+            return {}
+        n = len(samples)
+
+        def pick(pct):
+            return samples[min(n - 1, int(round(pct / 100.0 * (n - 1))))]
+
+        return {
+            "count": n,
+            "mean": sum(samples) / n,
+            "p50": pick(50),
+            "p90": pick(90),
+            "p99": pick(99),
+        }
+
+    def snapshot(self):
+        """Return a plain dict of all counters and sample summaries."""
+        with self._lock:
+            counters = dict(self._counters)
+            names = list(self._samples)
+        return {
+            "counters": counters,
+            "samples": {name: self.summary(name) for name in names},
+        }
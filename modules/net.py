@@ -0,0 +1,516 @@
+"""
+voice_type_net.py - Asyncio I/O core for every transcription request.
+
+ApiClient runs one event loop with a pooled httpx.AsyncClient on a daemon
+thread; submit() works from any thread. Requests get length-scaled timeouts,
+retries with backoff, a CircuitBreaker and optional hedging.
+"""
+
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+import httpx
+
+from .core import GROQ_MODEL, GROQ_TRANSCRIPTIONS
+from .encode import upload_file
+from .metrics import Metrics
+
+try:
+    import h2  # noqa: F401  (imported by httpx when http2=True)
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+
+GROQ_HOST = str(httpx.URL(GROQ_TRANSCRIPTIONS).join("/"))
+HANDSHAKE_STEPS = ("connection.connect_tcp", "connection.start_tls")
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+BASE_TIMEOUT = 15.0          # seconds, plus SECONDS_PER_AUDIO_SECOND per second of audio
+SECONDS_PER_AUDIO_SECOND = 0.5
+MAX_TIMEOUT = 180.0
+
+LATENCY_BUCKETS = (5, 15, 30, 60, 120)   # upper bounds, seconds of audio
+HEDGE_MIN_SAMPLES = 10        # below this the bucket uses HEDGE_DEFAULT_DELAY
+HEDGE_DEFAULT_DELAY = 3.0
+HEDGE_MIN_DELAY = 0.3
+HEDGE_RATIO = 0.1             # budget earned per request: at most ~10% extra requests
+HEDGE_MAX_TOKENS = 2.0
+
+
+def latency_bucket(audio_seconds):
+    """Name of the rolling latency window for uploads of this length."""
+    if audio_seconds is None:
+        return "latency_unknown"
+    for bound in LATENCY_BUCKETS:
+        if audio_seconds < bound:
+            return f"latency_lt{bound}s"
+    return f"latency_ge{LATENCY_BUCKETS[-1]}s"
+
+
+def request_timeout(audio_seconds, default=30.0):
+    """Read/write timeout for an upload of audio_seconds (default when unknown)."""
+    if audio_seconds is None:
+        return default
+    return min(MAX_TIMEOUT, BASE_TIMEOUT + audio_seconds * SECONDS_PER_AUDIO_SECOND)
+
+
+def retry_after(response):
+    """Seconds from a Retry-After header (delta or HTTP date), or None."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def http_error(response):
+    """'HTTP <status>: <API message>' for a failed response."""
+    message = f"HTTP {response.status_code}"
+    try:
+        detail = response.json()["error"]
+        message += f": {detail.get('message', detail) if isinstance(detail, dict) else detail}"
+    except Exception:
+        pass
+    return message
+
+
+class CircuitBreaker:
+    """
+    closed → open after `threshold` consecutive failed calls; open rejects
+    calls for `cooldown` seconds, then half-open lets one trial call through,
+    whose result closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold=3, cooldown=30.0, on_change=None):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.on_change = on_change
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        """Seconds until an open circuit lets a trial through (0 if not open)."""
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def allow(self):
+        """True if a call may go out now."""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self._set("half-open")
+            if self.state == "half-open":
+                if self._trial:
+                    return False
+                self._trial = True
+            return True
+
+    def release(self):
+        """Give back a half-open trial whose call was cancelled before it had a result."""
+        with self._lock:
+            self._trial = False
+
+    def record(self, ok):
+        with self._lock:
+            self._trial = False
+            if ok:
+                self.failures = 0
+                if self.state != "closed":
+                    self._set("closed")
+                return
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.threshold:
+                self._opened_at = time.monotonic()
+                if self.state != "open":
+                    self._set("open")
+
+    def _set(self, state):
+        self.state = state
+        print(f"[http] Circuit {state}")
+        if self.on_change:
+            self.on_change(state)
+
+
+class ApiClient:
+    """
+    Event-loop thread + one httpx.AsyncClient, with connection-reuse
+    accounting, retries, a circuit breaker and hedging. Thread-safe: other
+    threads only call submit(), warm(), configure(), stats() and close().
+    """
+
+    def __init__(self, http2=True, max_connections=4, keepalive_expiry=60.0,
+                 timeout=30.0, metrics=None, retries=2, max_backoff=8.0, max_retry_wait=20.0,
+                 max_concurrent=4):
+        self.metrics = metrics
+        self.retries = retries
+        self.max_backoff = max_backoff
+        self.max_retry_wait = max_retry_wait   # give up rather than wait longer than this in total
+        self.max_concurrent = max_concurrent   # transcriptions in flight, across all callers
+        self.breaker = CircuitBreaker(on_change=self._breaker_changed)
+        self.latency = Metrics(window=50)   # request seconds per latency_bucket()
+        self.hedge_ratio = HEDGE_RATIO
+        self._hedge_tokens = HEDGE_MAX_TOKENS
+        self.requests = 0
+        self.reused = 0
+        self.handshakes = 0
+        self.handshake_time = 0.0
+        self._settings = None
+        self._lock = threading.Lock()
+        self._last_used = None          # monotonic time the pool last talked to the host
+        # Owned by the loop thread:
+        self._loop = None
+        self._client = None
+        self._hedge_client = None       # a second pool, so a hedge doesn't share the slow connection
+        self._limit = None
+        self._limit_size = None
+        self._warming = None            # task of a warm-up in progress
+        self.configure(http2, max_connections, keepalive_expiry, timeout)
+
+    # ------------------------------------------------------------------
+    # Loop thread
+    # ------------------------------------------------------------------
+
+    def _run(self, coro):
+        """Schedule a coroutine on the loop thread (started on first use)."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="api-loop", daemon=True).start()
+            loop = self._loop
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def configure(self, http2=True, max_connections=4, keepalive_expiry=60.0, timeout=30.0):
+        """Apply pool settings; the client is rebuilt on next use only if they changed."""
+        if http2 and not HAS_HTTP2:
+            print("[http] HTTP/2 needs the h2 package, using HTTP/1.1")
+            http2 = False
+        settings = (http2, max_connections, keepalive_expiry, timeout)
+        with self._lock:
+            if settings == self._settings:
+                return
+            self._settings = settings
+            old = [client for client in (self._client, self._hedge_client) if client is not None]
+            self._client = self._hedge_client = None
+            self._last_used = None
+        for client in old:
+            self._run(client.aclose())
+
+    def _new_client(self):
+        http2, max_connections, keepalive_expiry, timeout = self._settings
+        return httpx.AsyncClient(
+            http2=http2, timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+
+    def _pool(self):
+        if self._client is None:
+            self._client = self._new_client()
+        return self._client
+
+    def _hedge_pool(self):
+        if self._hedge_client is None:
+            self._hedge_client = self._new_client()
+        return self._hedge_client
+
+    def _limiter(self):
+        if self._limit is None or self._limit_size != self.max_concurrent:
+            self._limit = asyncio.Semaphore(self.max_concurrent)
+            self._limit_size = self.max_concurrent
+        return self._limit
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, audio, api_key, language="auto", custom_vocabulary=None,
+               filename="audio.wav", content_type="audio/wav", audio_seconds=None, hedge=False,
+               url=GROQ_TRANSCRIPTIONS, model=GROQ_MODEL):
+        """
+        Queue a Whisper transcription from any thread. `audio` is a file path
+        or a bytes-like buffer, read in place. An empty api_key sends no
+        Authorization header (self-hosted servers). Returns a Future that
+        resolves to (text, error), one of which is None.
+        """
+        return self._run(self._transcribe(
+            audio, api_key, language, custom_vocabulary, filename, content_type,
+            audio_seconds, hedge, url, model,
+        ))
+
+    def warm(self, url=GROQ_HOST):
+        """
+        Open a connection to the API host in the background unless the pool
+        was used recently enough to still hold one. Returns immediately.
+        """
+        keepalive = self._settings[2]
+        if self.breaker.state == "open":
+            return
+        if self._last_used is not None and time.monotonic() - self._last_used < keepalive * 0.8:
+            return
+        self._run(self._warm(url))
+
+    def stats(self):
+        """Requests, reuse rate, mean handshake and the handshake time saved by reuse."""
+        with self._lock:
+            mean = self.handshake_time / self.handshakes if self.handshakes else 0.0
+            return {
+                "requests": self.requests,
+                "reused": self.reused,
+                "reuse_rate": self.reused / self.requests if self.requests else 0.0,
+                "handshake_ms": mean * 1000,
+                "saved_ms": self.reused * mean * 1000,
+                "http2": self._settings[0],
+            }
+
+    def close(self):
+        """Close the connections and stop the loop thread."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+            clients = [client for client in (self._client, self._hedge_client) if client is not None]
+            self._client = self._hedge_client = None
+        if loop is None:
+            return
+        for client in clients:
+            try:
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(2.0)
+            except Exception:
+                pass
+        loop.call_soon_threadsafe(loop.stop)
+
+    # ------------------------------------------------------------------
+    # Requests (loop thread)
+    # ------------------------------------------------------------------
+
+    async def _transcribe(self, audio, api_key, language, custom_vocabulary, filename,
+                          content_type, audio_seconds, hedge, url, model):
+        data = {"model": model, "response_format": "json"}
+        if language and language != "auto":
+            data["language"] = language
+        if custom_vocabulary:
+            data["prompt"] = "Context: " + ", ".join(custom_vocabulary[:50])
+
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+        def build():
+            return {   # a fresh upload reader per attempt
+                "method": "POST", "url": url,
+                "headers": headers,
+                "files": {"file": upload_file(audio, filename, content_type)},
+                "data": data,
+            }
+
+        try:
+            async with self._limiter():
+                response = await self._call(build, audio_seconds, hedge)
+        except Exception as e:
+            return None, str(e) or type(e).__name__
+        if response.status_code == 200:
+            return response.json().get("text"), None
+        return None, http_error(response)
+
+    async def _send(self, http, request, timeout, account=True):
+        """One request; returns (response, handshake seconds or None if a connection was reused)."""
+        steps = {}
+
+        async def trace(event, info):
+            step, _, phase = event.rpartition(".")
+            if step in HANDSHAKE_STEPS:
+                if phase == "started":
+                    steps[step] = time.perf_counter()
+                elif phase == "complete":
+                    steps[step] = time.perf_counter() - steps[step]
+
+        try:
+            response = await http.request(**request, timeout=timeout, extensions={"trace": trace})
+        finally:
+            for upload in (request.get("files") or {}).values():
+                upload[1].close()
+        self._last_used = time.monotonic()
+        handshake = sum(steps.values()) if steps else None
+        if account:
+            self._account(handshake)
+        return response, handshake
+
+    async def _warm(self, url):
+        if self._warming is not None and not self._warming.done():
+            return
+        self._warming = asyncio.ensure_future(
+            self._send(self._pool(), {"method": "HEAD", "url": url}, self._settings[3], account=False)
+        )
+        try:
+            _, handshake = await self._warming
+        except Exception as e:
+            print(f"[http] Pre-warm failed: {e}")
+            return
+        if handshake is not None:
+            print(f"[http] Pre-warmed connection ({handshake * 1000:.0f} ms handshake)")
+            with self._lock:
+                self.handshakes += 1
+                self.handshake_time += handshake
+            if self.metrics is not None:
+                self.metrics.observe("handshake_ms", handshake * 1000)
+
+    async def _call(self, build, audio_seconds=None, hedge=False):
+        """
+        Run a request under the retry policy and circuit breaker. build()
+        returns fresh request arguments for each attempt. Returns the last
+        response; raises the last exception if every attempt failed without
+        one, or RuntimeError while the circuit is open.
+        """
+        if not self.breaker.allow():
+            raise RuntimeError(f"Service unavailable, retrying in {self.breaker.remaining():.0f}s")
+        try:
+            return await self._retrying(build, audio_seconds, hedge)
+        except asyncio.CancelledError:
+            # A cancelled call (e.g. the loser of a race) says nothing about the
+            # service, but must not keep holding the half-open trial.
+            self.breaker.release()
+            raise
+
+    async def _retrying(self, build, audio_seconds, hedge):
+        timeout = httpx.Timeout(request_timeout(audio_seconds, self._settings[3]), connect=10.0)
+        if self._warming is not None and not self._warming.done():
+            # Don't race a warm-up with a second connection.
+            await asyncio.wait({self._warming}, timeout=timeout.connect)
+        waited = 0.0
+        attempt = 0
+        while True:
+            error = response = None
+            try:
+                response = await self._attempt(build, timeout, audio_seconds, hedge)
+                failed = response.status_code in RETRY_STATUS
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                error, failed = e, True
+            except Exception:
+                self.breaker.record(False)
+                raise
+            if not failed or attempt >= self.retries:
+                self.breaker.record(not failed)
+                if error is not None:
+                    raise error
+                return response
+
+            delay = retry_after(response) if response is not None else None
+            if delay is None:
+                delay = random.uniform(0, min(self.max_backoff, 0.5 * 2 ** attempt))
+            if waited + delay > self.max_retry_wait:
+                print(f"[http] Not retrying: would wait {delay:.1f}s")
+                self.breaker.record(False)
+                if error is not None:
+                    raise error
+                return response
+            attempt += 1
+            waited += delay
+            reason = f"HTTP {response.status_code}" if response is not None else type(error).__name__
+            print(f"[http] {reason}, retry {attempt}/{self.retries} in {delay:.1f}s")
+            if self.metrics is not None:
+                self.metrics.incr("api_retries")
+            await asyncio.sleep(delay)
+
+    async def _attempt(self, build, timeout, audio_seconds, hedge):
+        bucket = latency_bucket(audio_seconds)
+        with self._lock:
+            self._hedge_tokens = min(HEDGE_MAX_TOKENS, self._hedge_tokens + self.hedge_ratio)
+        t0 = time.perf_counter()
+        if not hedge:
+            response, _ = await self._send(self._pool(), build(), timeout)
+            self.latency.observe(bucket, time.perf_counter() - t0)
+            return response
+
+        primary = asyncio.ensure_future(self._send(self._pool(), build(), timeout))
+
+        def observe(task):
+            if not task.cancelled() and task.exception() is None:
+                self.latency.observe(bucket, time.perf_counter() - t0)
+
+        primary.add_done_callback(observe)
+        delay = self.hedge_delay(bucket)
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()[0]
+        with self._lock:
+            allowed = self._hedge_tokens >= 1.0
+            if allowed:
+                self._hedge_tokens -= 1.0
+        if not allowed:
+            return (await primary)[0]
+
+        print(f"[http] No answer after {delay * 1000:.0f} ms, sending a hedge request")
+        if self.metrics is not None:
+            self.metrics.incr("hedges_sent")
+        second = asyncio.ensure_future(self._send(self._hedge_pool(), build(), timeout, account=False))
+        pending = {primary, second}
+        fallback = error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    response = task.result()[0]
+                    if response.status_code in RETRY_STATUS:
+                        fallback = response
+                        continue
+                    if task is second:
+                        # The primary is cancelled below, so its latency is never
+                        # observed; count this request at least as slow as the hedge
+                        # took, or the p90 (the hedge threshold) drifts down.
+                        elapsed = time.perf_counter() - t0
+                        self.latency.observe(bucket, elapsed)
+                        print(f"[http] Hedge won after {elapsed * 1000:.0f} ms")
+                        if self.metrics is not None:
+                            self.metrics.incr("hedges_won")
+                    return response
+            if fallback is not None:
+                return fallback
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()   # the loser: cancelling drops its connection
+
+    def hedge_delay(self, bucket):
+        """How long to wait before hedging: the bucket's rolling p90 latency."""
+        if self.latency.summary(bucket).get("count", 0) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, self.latency.percentile(bucket, 90))
+
+    def _breaker_changed(self, state):
+        if self.metrics is not None:
+            self.metrics.incr(f"breaker_{state.replace('-', '_')}")
+
+    def _account(self, handshake):
+        with self._lock:
+            self.requests += 1
+            if handshake is None:
+                self.reused += 1
+            else:
+                self.handshakes += 1
+                self.handshake_time += handshake
+        if self.metrics is not None:
+            if handshake is None:
+                self.metrics.incr("http_reused")
+            else:
+                self.metrics.incr("http_connects")
+                self.metrics.observe("handshake_ms", handshake * 1000)
+            # Rolling share of uploads that found a connection ready (mean of 0/1).
+            self.metrics.observe("upload_warm", 1.0 if handshake is None else 0.0)
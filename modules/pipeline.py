@@ -0,0 +1,119 @@
+"""
+voice_type_pipeline.py - Background transcription of recording segments.
+
+SegmentUploader transcribes the segments of one long dictation while it is
+recorded; SegmentPipeline delivers hands-free segments in submission order.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SegmentUploader:
+    """Ordered, bounded background transcription of segments."""
+
+    def __init__(self, transcribe_fn, max_workers=2):
+        """transcribe_fn(segment, index) -> (text, error)"""
+        self._transcribe = transcribe_fn
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="segment")
+        self._futures = []
+
+    def __len__(self):
+        return len(self._futures)
+
+    def submit(self, segment):
+        """Start transcribing a finished segment in the background."""
+        index = len(self._futures) + 1
+        self._futures.append(self._pool.submit(self._transcribe, segment, index))
+
+    def collect(self):
+        """
+        Wait for all submitted segments and return (text, error): the texts
+        joined in order, and the first error (if any segment failed).
+        """
+        texts = []
+        first_error = None
+        for i, future in enumerate(self._futures, 1):
+            try:
+                text, error = future.result()
+            except Exception as e:
+                text, error = None, str(e)
+            if text and text.strip():
+                texts.append(text.strip())
+            elif error:
+                print(f"[segment] Part {i} failed: {error}")
+                if first_error is None:
+                    first_error = f"Segment {i}: {error}"
+        return " ".join(texts) or None, first_error
+
+    def close(self):
+        """Release the worker threads; segments still in flight finish on their own."""
+        self._pool.shutdown(wait=False)
+
+
+class SegmentPipeline:
+    """
+    transcribe (parallel) → deliver (serial, in order) for a stream of segments.
+
+    At most max_pending segments are between submit() and delivery; submit()
+    blocks beyond that, so a slow or failing network back-pressures the
+    producer instead of piling up audio. Delivered segments are dropped, so
+    memory stays flat however long the session runs.
+    """
+
+    def __init__(self, transcribe_fn, deliver_fn, workers=2, max_pending=4):
+        """transcribe_fn(segment, index) -> (text, error); deliver_fn(text, error, index)"""
+        self._transcribe = transcribe_fn
+        self._deliver = deliver_fn
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="segment")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._queue = queue.Queue()
+        self._count = 0
+        self._thread = threading.Thread(target=self._run, name="segment-deliver", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return self._count
+
+    def reserve(self):
+        """Block until a slot is free and hold it for a submit(..., reserved=True)."""
+        if not self._slots.acquire(blocking=False):
+            print("[segment] Pipeline full, waiting for earlier segments")
+            self._slots.acquire()
+
+    def submit(self, segment, reserved=False):
+        """
+        Queue a finished segment and return its index (1-based); blocks while
+        max_pending segments are in flight unless a slot was reserved.
+        """
+        if not reserved:
+            self.reserve()
+        self._count += 1
+        self._queue.put((self._count, self._pool.submit(self._transcribe, segment, self._count)))
+        return self._count
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            index, future = item
+            try:
+                text, error = future.result()
+            except Exception as e:
+                text, error = None, str(e)
+            try:
+                self._deliver(text, error, index)
+            except Exception as e:
+                print(f"[segment] Delivering part {index} failed: {e}")
+            finally:
+                self._slots.release()
+
+    def close(self):
+        """Deliver everything already submitted, then stop the threads."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,135 @@
+"""
+voice_type_resample.py - Native capture format → 16 kHz mono conversion.
+
+Resampler downmixes and resamples 16-bit PCM chunk by chunk with a streaming
+polyphase FIR filter (NumPy), or audioop where NumPy is missing.
+"""
+
+import math
+import time
+import warnings
+
+try:
+    import numpy as np
+except ImportError:  # Lite builds may ship without NumPy
+    np = None
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:  # removed in Python 3.13
+    audioop = None
+
+
+ZERO_CROSSINGS = 10   # filter half-length, in zero crossings of the sinc
+KAISER_BETA = 5.0
+
+
+def can_resample():
+    """True if format conversion is possible in this environment."""
+    return np is not None or audioop is not None
+
+
+def polyphase_filter(up, down, zero_crossings=ZERO_CROSSINGS, beta=KAISER_BETA):
+    """
+    Design the anti-aliasing low-pass for resampling by up/down and split it
+    into `up` branches. Returns an (up, taps) array; row p holds the taps for
+    output phase p in reverse order, ready to dot with a chronological window.
+    """
+    factor = max(up, down)
+    half = zero_crossings * factor
+    n = 2 * half + 1
+    t = np.arange(n) - half
+    h = np.sinc(t / factor) * np.kaiser(n, beta)
+    h *= up / h.sum()  # unity gain after zero-stuffing by `up`
+    taps = -(-n // up)
+    h = np.concatenate([h, np.zeros(taps * up - n)])
+    return np.ascontiguousarray(h.reshape(taps, up).T[:, ::-1])
+
+
+class Resampler:
+    """Streaming 16-bit PCM converter from (in_rate, in_channels) to (out_rate, out_channels)."""
+
+    def __init__(self, in_rate, in_channels, out_rate, out_channels=1):
+        self.in_rate = in_rate
+        self.in_channels = in_channels
+        self.out_rate = out_rate
+        self.out_channels = out_channels
+        g = math.gcd(in_rate, out_rate)
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.busy = 0.0   # seconds spent converting since the last reset()
+
+        self._coeffs = None
+        if np is not None and self.up != self.down:
+            self._coeffs = polyphase_filter(self.up, self.down)
+        self.reset()
+
+    @property
+    def passthrough(self):
+        return self.in_rate == self.out_rate and self.in_channels == self.out_channels
+
+    def reset(self):
+        """Forget filter history (start of a new recording)."""
+        self.busy = 0.0
+        self._ratecv_state = None
+        self._next_out = 0     # absolute index of the next output sample
+        self._consumed = 0     # absolute input samples seen so far
+        if self._coeffs is not None:
+            self._history = np.zeros(self._coeffs.shape[1] - 1)
+
+    def process(self, data):
+        """Convert one chunk; returns bytes (possibly empty for tiny chunks)."""
+        if self.passthrough:
+            return data
+        t0 = time.perf_counter()
+        out = self._process_numpy(data) if np is not None else self._process_audioop(data)
+        self.busy += time.perf_counter() - t0
+        return out
+
+    def _process_numpy(self, data):
+        frame = 2 * self.in_channels
+        usable = len(data) - len(data) % frame
+        x = np.frombuffer(data, dtype="<i2", count=usable // 2)
+        if self.in_channels > 1:
+            x = x.reshape(-1, self.in_channels).mean(axis=1)
+        else:
+            x = x.astype(np.float64)
+
+        if self._coeffs is None:
+            y = x
+        else:
+            taps = self._coeffs.shape[1]
+            x = np.concatenate([self._history, x])
+            offset = self._consumed - (taps - 1)   # absolute index of x[0]
+            self._consumed += len(x) - (taps - 1)
+
+            # Output n uses inputs up to floor(n * down / up); emit every n
+            # whose newest input has arrived.
+            end = -(-self._consumed * self.up // self.down)
+            n = np.arange(self._next_out, end, dtype=np.int64)
+            self._next_out = end
+            base = n * self.down // self.up - offset
+            windows = x[base[:, None] + np.arange(1 - taps, 1)]
+            y = np.einsum("ij,ij->i", windows, self._coeffs[n * self.down % self.up])
+            self._history = x[len(x) - (taps - 1):]
+
+        y = np.clip(np.rint(y), -32768, 32767).astype("<i2")
+        if self.out_channels > 1:
+            y = np.repeat(y, self.out_channels)
+        return y.tobytes()
+
+    def _process_audioop(self, data):
+        frame = 2 * self.in_channels
+        data = bytes(memoryview(data)[:len(data) - len(data) % frame])
+        if self.in_channels == 2 and self.out_channels == 1:
+            data = audioop.tomono(data, 2, 0.5, 0.5)
+            channels = 1
+        else:
+            channels = self.in_channels
+        if self.in_rate != self.out_rate:
+            data, self._ratecv_state = audioop.ratecv(
+                data, 2, channels, self.in_rate, self.out_rate, self._ratecv_state,
+            )
+        return data
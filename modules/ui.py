@@ -9,6 +9,7 @@ Required callbacks keys:
     get_last_transcription()  -> str
     get_history()             -> list
     get_stats()               -> dict
+    get_input_devices()       -> list   (InputDevice objects from the device registry)
     on_stats_reset()          -> None   (resets stats in caller)
     on_settings_saved()       -> None   (propagates config changes to caller's globals)
     transcribe_file()         -> None   (opens file-transcription picker)
@@ -22,14 +23,15 @@ import time
 from pathlib import Path
 
 import keyboard
-import pyaudio
 import pyperclip
 import pystray
 import tkinter as tk
 from tkinter import font as tkfont, ttk, messagebox
 from PIL import Image, ImageDraw
 
+from .backends import DEFAULT_BACKENDS
 from .core import CONFIG_FILE, DEFAULT_FILTER_WORDS
+from .encode import available_codecs
 
 # ---------------------------------------------------------------------------
 # Module-level popup-visibility flags
@@ -447,22 +449,30 @@ class FloatingWidget:
                                   font=("Segoe UI", 10))
         mic_combo.pack(fill=tk.X, pady=(5, 15))
 
-        p = pyaudio.PyAudio()
-        mics = []
-        for i in range(p.get_device_count()):
-            dev = p.get_device_info_by_index(i)
-            if dev["maxInputChannels"] > 0:
-                mics.append((i, dev["name"]))
-        p.terminate()
-        mic_combo["values"] = [f"{i}: {n}" for i, n in mics]
-        mic_index = cfg.get("mic_index")
-        if mic_index is not None:
-            for idx, (i, _n) in enumerate(mics):
-                if i == mic_index:
-                    mic_combo.current(idx)
-                    break
-        elif mics:
-            mic_combo.current(0)
+        mics = self.callbacks["get_input_devices"]()
+        mic_combo["values"] = [f"{d.index}: {d.name} ({d.host_api})" for d in mics]
+        mic_device, mic_index = cfg.get("mic_device"), cfg.get("mic_index")
+        for idx, dev in enumerate(mics):
+            selected = dev.key == mic_device if mic_device else dev.index == mic_index
+            if selected:
+                mic_combo.current(idx)
+                break
+        else:
+            if mics:
+                mic_combo.current(0)
+
+        tk.Label(gen, text="Extra mics for meeting recording (each transcribed separately):",
+                 **label_style).pack(anchor="w")
+        meeting_list = tk.Listbox(gen, selectmode=tk.MULTIPLE, height=3, exportselection=False,
+                                  bg=self.bg_light, fg=self.text_primary,
+                                  selectbackground=self.border_color, relief="flat",
+                                  font=("Segoe UI", 9))
+        meeting_list.pack(fill=tk.X, pady=(5, 15))
+        meeting_keys = cfg.get("meeting_devices", [])
+        for idx, dev in enumerate(mics):
+            meeting_list.insert(tk.END, f"{dev.name} ({dev.host_api})")
+            if dev.key in meeting_keys:
+                meeting_list.selection_set(idx)
 
         tk.Label(gen, text="⌨ Push-to-Talk Key", font=("Segoe UI", 11, "bold"),
                  fg=self.border_color, bg=self.bg_dark).pack(anchor="w", pady=(0, 5))
@@ -583,6 +593,45 @@ class FloatingWidget:
                        selectcolor=self.bg_light, activebackground=self.bg_dark,
                        font=("Segoe UI", 10), cursor="hand2").pack(anchor="w", pady=2)
 
+        preroll_frame = tk.Frame(rec, bg=self.bg_dark)
+        preroll_frame.pack(fill=tk.X, pady=2)
+        tk.Label(preroll_frame, text="⏪ Pre-roll (seconds):", **label_style).pack(side=tk.LEFT)
+        preroll_var = tk.DoubleVar(value=cfg.get("pre_roll", 0.3))
+        tk.Spinbox(preroll_frame, from_=0.0, to=1.0, increment=0.1, width=5,
+                   textvariable=preroll_var, **input_style).pack(side=tk.LEFT, padx=5)
+        tk.Label(preroll_frame, text="(keeps the mic open; 0 = off)",
+                 bg=self.bg_dark, fg=self.text_secondary, font=("Segoe UI", 9)).pack(side=tk.LEFT)
+
+        trim_frame = tk.Frame(rec, bg=self.bg_dark)
+        trim_frame.pack(fill=tk.X, pady=2)
+        trim_var = tk.BooleanVar(value=cfg.get("trim_silence", True))
+        tk.Checkbutton(trim_frame, text="✂ Trim silence before upload, keeping",
+                       variable=trim_var, bg=self.bg_dark, fg=self.text_primary,
+                       selectcolor=self.bg_light, activebackground=self.bg_dark,
+                       font=("Segoe UI", 10), cursor="hand2").pack(side=tk.LEFT)
+        trim_guard_var = tk.DoubleVar(value=cfg.get("trim_guard", 0.25))
+        tk.Spinbox(trim_frame, from_=0.0, to=1.0, increment=0.05, width=5,
+                   textvariable=trim_guard_var, **input_style).pack(side=tk.LEFT, padx=5)
+        tk.Label(trim_frame, text="s margin", **label_style).pack(side=tk.LEFT)
+
+        skip_silent_var = tk.BooleanVar(value=cfg.get("skip_silent", True))
+        tk.Checkbutton(rec, text="🔇 Don't send recordings with no speech",
+                       variable=skip_silent_var, bg=self.bg_dark, fg=self.text_primary,
+                       selectcolor=self.bg_light, activebackground=self.bg_dark,
+                       font=("Segoe UI", 10), cursor="hand2").pack(anchor="w", pady=2)
+
+        segment_frame = tk.Frame(rec, bg=self.bg_dark)
+        segment_frame.pack(fill=tk.X, pady=2)
+        segment_var = tk.BooleanVar(value=cfg.get("segment_uploads", True))
+        tk.Checkbutton(segment_frame, text="🧩 Transcribe long dictations in parts after",
+                       variable=segment_var, bg=self.bg_dark, fg=self.text_primary,
+                       selectcolor=self.bg_light, activebackground=self.bg_dark,
+                       font=("Segoe UI", 10), cursor="hand2").pack(side=tk.LEFT)
+        segment_min_var = tk.DoubleVar(value=cfg.get("segment_min_seconds", 10.0))
+        tk.Spinbox(segment_frame, from_=5.0, to=60.0, increment=5.0, width=5,
+                   textvariable=segment_min_var, **input_style).pack(side=tk.LEFT, padx=5)
+        tk.Label(segment_frame, text="s, at pauses", **label_style).pack(side=tk.LEFT)
+
         tk.Label(rec, text="🚫 Filter Words", font=("Segoe UI", 11, "bold"),
                  fg=self.border_color, bg=self.bg_dark).pack(anchor="w", pady=(15, 5))
         tk.Label(rec, text="Phrases to block (comma-separated):",
@@ -663,6 +712,22 @@ class FloatingWidget:
         )
         stats_trans_label.pack(anchor="w")
 
+        def glitch_text(s):
+            return (f"🎙 Lost input: {s.get('input_overflows', 0):,} overflows, "
+                    f"{s.get('input_underruns', 0):,} underruns, "
+                    f"{s.get('input_dropped', 0):,} dropped chunks")
+
+        stats_glitch_label = tk.Label(
+            stats_frame, text=glitch_text(stats),
+            bg=self.bg_light, fg=self.text_primary, font=("Segoe UI", 10),
+        )
+        stats_glitch_label.pack(anchor="w")
+        stats_skip_label = tk.Label(
+            stats_frame, text=f"🔇 Silent clips not sent: {stats.get('skipped_silent', 0):,}",
+            bg=self.bg_light, fg=self.text_primary, font=("Segoe UI", 10),
+        )
+        stats_skip_label.pack(anchor="w")
+
         stats_reset_label = tk.Label(
             stats_frame, text="", bg=self.bg_light, fg=self.accent_success,
             font=("Segoe UI", 9),
@@ -673,6 +738,8 @@ class FloatingWidget:
             self.callbacks["on_stats_reset"]()
             stats_words_label.config(text="📝 Words typed: 0")
             stats_trans_label.config(text="🎤 Transcriptions: 0")
+            stats_glitch_label.config(text=glitch_text({}))
+            stats_skip_label.config(text="🔇 Silent clips not sent: 0")
             stats_reset_label.config(text="✓ Reset!")
             win.after(1500, lambda: stats_reset_label.config(text=""))
 
@@ -710,6 +777,53 @@ class FloatingWidget:
                        selectcolor=self.bg_light, activebackground=self.bg_dark,
                        font=("Segoe UI", 10), cursor="hand2").pack(anchor="w", pady=2)
 
+        codec_frame = tk.Frame(adv, bg=self.bg_dark)
+        codec_frame.pack(fill=tk.X, pady=2)
+        tk.Label(codec_frame, text="Upload format:", **label_style).pack(side=tk.LEFT)
+        codec_var = tk.StringVar(value=cfg.get("upload_codec", "flac"))
+        ttk.Combobox(codec_frame, textvariable=codec_var, values=available_codecs(),
+                     state="readonly", width=8).pack(side=tk.LEFT, padx=5)
+        tk.Label(codec_frame, text="(flac = lossless, ~half the upload)",
+                 bg=self.bg_dark, fg=self.text_secondary, font=("Segoe UI", 9)).pack(side=tk.LEFT)
+
+        backend_frame = tk.Frame(adv, bg=self.bg_dark)
+        backend_frame.pack(fill=tk.X, pady=2)
+        tk.Label(backend_frame, text="Transcription backend:", **label_style).pack(side=tk.LEFT)
+        backend_var = tk.StringVar(value=cfg.get("backend", "groq"))
+        ttk.Combobox(backend_frame, textvariable=backend_var,
+                     values=list(cfg.get("backends") or DEFAULT_BACKENDS),
+                     state="readonly", width=12).pack(side=tk.LEFT, padx=5)
+        tk.Label(backend_frame, text="(profiles: \"backends\" in the config file)",
+                 bg=self.bg_dark, fg=self.text_secondary, font=("Segoe UI", 9)).pack(side=tk.LEFT)
+
+        race_var = tk.BooleanVar(value=cfg.get("race_backends", False))
+        tk.Checkbutton(adv, text=f"Race short dictations against the \"{cfg.get('race_with', 'local')}\" "
+                                 "backend (first result wins)",
+                       variable=race_var, bg=self.bg_dark, fg=self.text_primary,
+                       selectcolor=self.bg_light, activebackground=self.bg_dark,
+                       font=("Segoe UI", 10), cursor="hand2").pack(anchor="w", pady=2)
+
+        capture_proc_var = tk.BooleanVar(value=cfg.get("capture_process", False))
+        tk.Checkbutton(adv, text="Capture audio in a separate process (fewer dropouts under load)",
+                       variable=capture_proc_var, bg=self.bg_dark, fg=self.text_primary,
+                       selectcolor=self.bg_light, activebackground=self.bg_dark,
+                       font=("Segoe UI", 10), cursor="hand2").pack(anchor="w", pady=2)
+        capture_prio_var = tk.BooleanVar(value=cfg.get("capture_high_priority", False))
+        tk.Checkbutton(adv, text="   ...at raised priority",
+                       variable=capture_prio_var, bg=self.bg_dark, fg=self.text_primary,
+                       selectcolor=self.bg_light, activebackground=self.bg_dark,
+                       font=("Segoe UI", 10), cursor="hand2").pack(anchor="w", pady=2)
+        http2_var = tk.BooleanVar(value=cfg.get("http2", True))
+        tk.Checkbutton(adv, text="Use HTTP/2 for uploads (one connection, kept open)",
+                       variable=http2_var, bg=self.bg_dark, fg=self.text_primary,
+                       selectcolor=self.bg_light, activebackground=self.bg_dark,
+                       font=("Segoe UI", 10), cursor="hand2").pack(anchor="w", pady=2)
+        hedge_var = tk.BooleanVar(value=cfg.get("hedge_requests", False))
+        tk.Checkbutton(adv, text="Resend slow uploads on a second connection (up to ~10% extra requests)",
+                       variable=hedge_var, bg=self.bg_dark, fg=self.text_primary,
+                       selectcolor=self.bg_light, activebackground=self.bg_dark,
+                       font=("Segoe UI", 10), cursor="hand2").pack(anchor="w", pady=2)
+
         # Macros
         tk.Label(adv, text="🔧 Voice Macros", font=("Segoe UI", 11, "bold"),
                  fg=self.border_color, bg=self.bg_dark).pack(anchor="w", pady=(15, 5))
@@ -764,9 +878,12 @@ class FloatingWidget:
         # ── Button bar (frame created above, buttons added here) ──────
         def save():
             cfg["api_key"] = api_entry.get().strip()
-            selected_mic = mic_combo.get()
-            if selected_mic:
-                cfg["mic_index"] = int(selected_mic.split(":")[0])
+            selected_mic = mic_combo.current()
+            if 0 <= selected_mic < len(mics):
+                cfg["mic_index"] = mics[selected_mic].index
+                cfg["mic_device"] = mics[selected_mic].key
+            if mics:
+                cfg["meeting_devices"] = [mics[i].key for i in meeting_list.curselection()]
             cfg["hotkey"] = hotkey_var.get().lower()
             cfg["accounting_mode"] = accounting_var.get()
             cfg["accounting_comma"] = comma_var.get()
@@ -784,8 +901,30 @@ class FloatingWidget:
             cfg["compact_mode"] = compact_var.get()
             cfg["accent_color"] = accent_var.get()
             cfg["save_audio"] = save_audio_var.get()
+            cfg["upload_codec"] = codec_var.get()
+            cfg["backend"] = backend_var.get()
+            cfg["race_backends"] = race_var.get()
+            cfg["capture_process"] = capture_proc_var.get()
+            cfg["capture_high_priority"] = capture_prio_var.get()
+            cfg["http2"] = http2_var.get()
+            cfg["hedge_requests"] = hedge_var.get()
             cfg["auto_copy"] = auto_copy_var.get()
             cfg["show_timer"] = show_timer_var.get()
+            try:
+                cfg["pre_roll"] = max(0.0, min(1.0, float(preroll_var.get())))
+            except (tk.TclError, ValueError):
+                pass
+            cfg["trim_silence"] = trim_var.get()
+            try:
+                cfg["trim_guard"] = max(0.0, min(1.0, float(trim_guard_var.get())))
+            except (tk.TclError, ValueError):
+                pass
+            cfg["skip_silent"] = skip_silent_var.get()
+            cfg["segment_uploads"] = segment_var.get()
+            try:
+                cfg["segment_min_seconds"] = max(5.0, min(60.0, float(segment_min_var.get())))
+            except (tk.TclError, ValueError):
+                pass
             cfg["minimize_startup"] = minimize_var.get()
             if autostart_var is not None:
                 cfg["autostart"] = autostart_var.get()
@@ -807,7 +946,7 @@ class FloatingWidget:
             if not messagebox.askyesno("Reset", "Reset all settings to defaults?"):
                 return
             defaults = {
-                "api_key": "", "mic_index": None, "hotkey": "shift",
+                "api_key": "", "mic_index": None, "mic_device": None, "hotkey": "shift",
                 "accounting_mode": False, "accounting_comma": False,
                 "casual_mode": False, "kaomoji_mode": False,
                 "filter_words": list(DEFAULT_FILTER_WORDS),
@@ -815,7 +954,12 @@ class FloatingWidget:
                 "auto_stop": False, "always_on_top": True, "autohide": True,
                 "compact_mode": False, "accent_color": "#6366f1",
                 "save_audio": False, "auto_copy": True, "show_timer": True,
-                "minimize_startup": False,
+                "minimize_startup": False, "pre_roll": 0.3, "upload_codec": "flac",
+                "trim_silence": True, "trim_guard": 0.25,
+                "segment_uploads": True, "segment_min_seconds": 10.0,
+                "capture_process": False, "capture_high_priority": False, "http2": True,
+                "hedge_requests": False, "backend": "groq",
+                "race_backends": False, "skip_silent": True, "meeting_devices": [],
             }
             cfg.update(defaults)
             CONFIG_FILE.write_text(json.dumps(cfg, indent=2))
@@ -934,6 +1078,8 @@ def create_tray_icon(widget, version, hotkey, callbacks):
         get_last_transcription()  -> str
         export_history()          -> None
         transcribe_file()         -> None
+        toggle_meeting()          -> None
+        meeting_active()          -> bool
     """
     img = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
     dc = ImageDraw.Draw(img)
@@ -964,6 +1110,14 @@ def create_tray_icon(widget, version, hotkey, callbacks):
     def on_transcribe_file(icon, item):
         callbacks["transcribe_file"]()
 
+    def on_meeting(icon, item):
+        callbacks["toggle_meeting"]()
+
+    def meeting_label(item):
+        if callbacks["meeting_active"]():
+            return "⏹ Stop Meeting Recording"
+        return "🎙 Record Meeting"
+
     def on_quit(icon, item):
         widget.root.after(0, widget.quit_app)
 
@@ -973,6 +1127,7 @@ def create_tray_icon(widget, version, hotkey, callbacks):
         pystray.MenuItem("Export History", on_export),
         pystray.Menu.SEPARATOR,
         pystray.MenuItem("📁 Transcribe Audio File...", on_transcribe_file),
+        pystray.MenuItem(meeting_label, on_meeting),
         pystray.MenuItem("Copy Last", on_copy_last, default=False),
         pystray.MenuItem("Show Widget", on_show),
         pystray.Menu.SEPARATOR,
@@ -987,7 +1142,7 @@ def create_tray_icon(widget, version, hotkey, callbacks):
 
 
 # ---------------------------------------------------------------------------
-# Popup dialogs (standalone, called from hotkey_loop)
+# Popup dialogs (standalone, opened from the F1-F3 key hooks)
 # ---------------------------------------------------------------------------
 
 def show_shortcuts_overlay(hotkey):
@@ -1027,6 +1182,7 @@ def show_shortcuts_overlay(hotkey):
         ("Show shortcuts", "F1", "This overlay"),
         ("Quick snippets", "F2", "Common phrases"),
         ("Language switcher", "F3", "Switch languages"),
+        ("Hands-free dictation", "F4", "Toggle continuous mode"),
         ("Settings", "Right-click tray", "Open settings"),
         ("Context menu", "Right-click widget", "Quick actions"),
         ("Quit", "Right-click tray → Quit", ""),
@@ -1185,7 +1341,7 @@ def show_language_switcher(config, on_language_change):
 
 
 # ---------------------------------------------------------------------------
-# Visibility helpers (for hotkey_loop to query)
+# Visibility helpers (for the key hooks to query)
 # ---------------------------------------------------------------------------
 
 def shortcuts_visible():
@@ -0,0 +1,179 @@
+"""
+voice_type_vad.py - Energy-based voice activity helpers for Voice Type.
+
+trim_silence/speech_bounds/speech_seconds analyse a finished recording in
+20 ms frames; VoiceActivityDetector decides speech/non-speech while recording.
+"""
+
+from .metering import frame_rms, rms
+
+
+FRAME_MS = 20
+FLOOR_PERCENTILE = 10
+FLOOR_MULTIPLIER = 3.0
+FLOOR_MIN = 1e-4
+FLOOR_MAX = 0.05        # -26 dBFS: a steadier window than this is taken for a held note
+FLOOR_STEADY_RATIO = 2.0
+
+
+def noise_floor(levels, percentile=FLOOR_PERCENTILE):
+    """Estimate the background level as a low percentile of frame levels."""
+    if not levels:
+        return 0.0
+    ordered = sorted(levels)
+    return ordered[min(len(ordered) - 1, len(ordered) * percentile // 100)]
+
+
+def speech_threshold(min_level, floor=None):
+    """Frame RMS above which a frame counts as speech, given a known room floor."""
+    return max(min_level, (floor or 0.0) * FLOOR_MULTIPLIER)
+
+
+def speech_bounds(pcm, rate, channels=1, min_level=0.01, floor=None, frame_ms=FRAME_MS):
+    """
+    Return (first, last) frame indices (last exclusive) spanning all speech
+    frames in pcm, the frame size in bytes, or None if no frame is speech.
+    Like speech_seconds(), the threshold is absolute, not relative to the clip.
+    """
+    frame_samples = max(1, rate * frame_ms // 1000) * channels
+    levels = frame_rms(pcm, frame_samples)
+    if not levels:
+        return None
+    threshold = speech_threshold(min_level, floor)
+    voiced = [i for i, level in enumerate(levels) if level > threshold]
+    if not voiced:
+        return None
+    return voiced[0], voiced[-1] + 1, frame_samples * 2
+
+
+def speech_seconds(pcm, rate, channels=1, min_level=0.01, floor=None, frame_ms=FRAME_MS):
+    """
+    Total duration of the frames in pcm that count as speech. The threshold is
+    absolute (min_level, or FLOOR_MULTIPLIER x a known room floor) rather than
+    relative to the clip, so speech from start to end counts in full. Without
+    a floor, a clip with no frame below min_level is never treated as silent.
+    """
+    frame_samples = max(1, rate * frame_ms // 1000) * channels
+    levels = frame_rms(pcm, frame_samples)
+    if not levels:
+        return 0.0
+    if floor is None and min(levels) >= min_level:
+        return len(levels) * frame_ms / 1000
+    threshold = speech_threshold(min_level, floor)
+    return sum(1 for level in levels if level > threshold) * frame_ms / 1000
+
+
+def trim_silence(buffer, guard=0.25, min_level=0.01, floor=None):
+    """
+    Trim leading/trailing non-speech from a PcmBuffer in place, keeping
+    `guard` seconds of margin on each side. `floor` is the room's noise
+    floor if known (e.g. VoiceActivityDetector.floor). Returns (lead_cut,
+    tail_cut) in seconds; nothing is cut if no speech is found.
+    """
+    pcm = buffer.pcm()
+    bounds = speech_bounds(pcm, buffer.rate, buffer.channels, min_level, floor)
+    if bounds is None:
+        return 0.0, 0.0
+    first, last, frame_bytes = bounds
+
+    bytes_per_second = buffer.rate * buffer.block_align
+    guard_bytes = int(guard * buffer.rate) * buffer.block_align
+    start = max(0, first * frame_bytes - guard_bytes)
+    end = min(len(pcm), last * frame_bytes + guard_bytes)
+    del pcm  # release the view before the buffer is re-sliced
+
+    total = len(buffer)
+    buffer.trim(start, end)
+    return start / bytes_per_second, (total - end) / bytes_per_second
+
+
+class VoiceActivityDetector:
+    """
+    Streaming speech/non-speech decision per chunk with noise-floor tracking.
+
+    A chunk is "loud" above max(min_level, floor * on_ratio) and "quiet" below
+    off_ratio of that. Speech starts after `attack` seconds of loud chunks and
+    ends after `release` seconds of quiet ones; chunks in between keep the
+    current state. The floor keeps adapting slowly on quiet chunks only, and
+    rises by at most `rise` (a fraction per second), so talking over it can't
+    drag it up to speech level.
+    """
+
+    def __init__(self, rate, channels=1, min_level=0.01, floor=None,
+                 calibration=0.3, attack=0.05, release=0.3,
+                 on_ratio=FLOOR_MULTIPLIER, off_ratio=0.6, adapt=0.05, rise=0.5):
+        self.rate = rate
+        self.channels = channels
+        self.min_level = min_level
+        self.floor = floor
+        self.calibration = calibration
+        self.attack = attack
+        self.release = release
+        self.on_ratio = on_ratio
+        self.off_ratio = off_ratio
+        self.adapt = adapt
+        self.rise = rise
+
+        self.speaking = False
+        self.heard_speech = False
+        self.heard_quiet = False    # a quiet stretch was seen: the floor is worth keeping
+        self.elapsed = 0.0      # seconds of audio processed
+        self.silence = 0.0      # seconds of continuous non-speech
+        self._calib_levels = []
+        self._loud = 0.0
+        self._quiet = 0.0
+
+    @property
+    def threshold(self):
+        return max(self.min_level, (self.floor or 0.0) * self.on_ratio)
+
+    def process(self, chunk):
+        """Feed one PCM chunk; returns True while speech is active."""
+        dt = len(chunk) / (2 * self.channels * self.rate)
+        if not dt:
+            return self.speaking
+        level = rms(chunk)
+        self.elapsed += dt
+
+        if self.floor is None:
+            self._calib_levels.append(level)
+            self.silence += dt
+            if self.elapsed >= self.calibration:
+                # A window spent talking would otherwise become the floor, so an
+                # uneven one is capped at min_level; a steady loud room is kept.
+                floor = max(FLOOR_MIN, noise_floor(self._calib_levels))
+                steady = noise_floor(self._calib_levels, 100 - FLOOR_PERCENTILE) <= floor * FLOOR_STEADY_RATIO
+                self.floor = min(FLOOR_MAX if steady else self.min_level, floor)
+                self._calib_levels = []
+            return False
+
+        on = self.threshold
+        off = on * self.off_ratio
+        if level >= on:
+            self._loud += dt
+            self._quiet = 0.0
+        elif level < off:
+            self._quiet += dt
+            self._loud = 0.0
+            if self._quiet >= self.release:
+                self.heard_quiet = True
+        elif self.speaking:
+            self._quiet = 0.0
+        else:
+            self._loud = 0.0
+
+        if not self.speaking and self._loud >= self.attack:
+            self.speaking = True
+            self.heard_speech = True
+        elif self.speaking and self._quiet >= self.release:
+            self.speaking = False
+            self.silence = self._quiet  # non-speech began when the quiet run did
+        elif not self.speaking:
+            self.silence += dt
+
+        if self.speaking:
+            self.silence = 0.0
+        elif level < off:
+            floor = self.floor + (level - self.floor) * self.adapt
+            self.floor = max(FLOOR_MIN, min(floor, self.floor * (1 + self.rise * dt)))
+        return self.speaking
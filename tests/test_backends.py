@@ -0,0 +1,97 @@
+"""
+test_backends.py - RaceBackend decisions with fake backends whose futures the test completes.
+
+Usage:
+    python -m pytest tests
+"""
+
+import sys
+import unittest
+from concurrent.futures import Future
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.backends import RaceBackend  # noqa: E402
+
+
+class FakeBackend:
+    """Hands out futures the test resolves; running=True ones can't be cancelled, like a local decode."""
+
+    def __init__(self, name, running=False, problem=None):
+        self.name = name
+        self.running = running
+        self.futures = []
+        self.inputs = []
+        self._problem = problem
+
+    def problem(self):
+        return self._problem
+
+    def submit(self, audio, wav=None, **kwargs):
+        self.inputs.append((audio, wav))
+        future = Future()
+        if self.running:
+            future.set_running_or_notify_cancel()
+        self.futures.append(future)
+        return future
+
+
+class RaceBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.cloud = FakeBackend("cloud")
+        self.local = FakeBackend("local", running=True)
+        self.race = RaceBackend([self.cloud, self.local], max_seconds=15.0)
+
+    def submit(self, seconds=2.0):
+        return self.race.submit(b"RIFF", audio_seconds=seconds)
+
+    def test_both_sides_get_copies_of_upload_and_wav(self):
+        payload, wav = bytearray(b"fLaC"), bytearray(b"RIFF")
+        self.race.submit(memoryview(payload), audio_seconds=2.0, wav=memoryview(wav))
+        payload[:], wav[:] = b"xxxx", b"xxxx"   # the caller released its buffers
+        self.assertEqual(self.cloud.inputs, [(b"fLaC", b"RIFF")])
+        self.assertEqual(self.local.inputs, [(b"fLaC", b"RIFF")])
+
+    def test_first_success_wins_over_an_earlier_error(self):
+        result = self.submit()
+        self.cloud.futures[0].set_result((None, "HTTP 500"))
+        self.assertFalse(result.done())
+        self.local.futures[0].set_result(("local text", None))
+        self.assertEqual(result.result(1), ("local text", None))
+        self.assertEqual(self.race.stats.count("lt5s:local:wins"), 1)
+
+    def test_both_failing_reports_both_errors(self):
+        result = self.submit()
+        self.local.futures[0].set_result((None, "model missing"))
+        self.cloud.futures[0].set_result((None, "HTTP 500"))
+        self.assertEqual(result.result(1), (None, "local: model missing; cloud: HTTP 500"))
+        self.assertEqual(self.race.stats.count("lt5s:races"), 1)
+
+    def test_long_audio_and_unready_backends_skip_the_race(self):
+        self.assertIs(self.submit(seconds=20.0), self.cloud.futures[0])
+        self.assertEqual(self.local.futures, [])
+        self.cloud._problem = "No API key"
+        self.assertIs(self.submit(), self.local.futures[0])
+        self.assertEqual(len(self.cloud.futures), 1)
+
+    def test_cancelled_cloud_loser_is_counted(self):
+        result = self.submit()
+        self.local.futures[0].set_result(("local text", None))
+        self.assertEqual(result.result(1), ("local text", None))
+        self.assertTrue(self.cloud.futures[0].cancelled())
+        self.assertEqual(self.race.stats.count("lt5s:cloud:cancelled"), 1)
+        self.assertIn("1 cancelled", self.race.report("lt5s"))
+
+    def test_local_loser_latency_is_recorded(self):
+        result = self.submit()
+        self.cloud.futures[0].set_result(("cloud text", None))
+        self.assertEqual(result.result(1), ("cloud text", None))
+        self.assertFalse(self.local.futures[0].cancel())   # already decoding
+        self.local.futures[0].set_result(("local text", None))
+        self.assertEqual(self.race.stats.summary("lt5s:local")["count"], 1)
+        self.assertEqual(self.race.stats.count("lt5s:local:wins"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+test_capture.py - CaptureEngine construction and pre-roll bookkeeping, without audio hardware.
+
+Usage:
+    python -m pytest tests
+"""
+
+import sys
+import time
+import types
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    import pyaudio  # noqa: F401
+except ImportError:   # only the constants and the class name are touched without a device
+    stub = types.ModuleType("pyaudio")
+    stub.paInt16, stub.paInputUnderflow, stub.paInputOverflow, stub.paContinue = 8, 1, 2, 0
+    stub.PyAudio = object
+    sys.modules["pyaudio"] = stub
+
+from modules.capture import CaptureEngine, RingBuffer  # noqa: E402
+from modules.capture_process import ProcessCaptureEngine  # noqa: E402
+
+
+class CaptureEngineTest(unittest.TestCase):
+    def test_construct_with_and_without_preroll(self):
+        for engine in (CaptureEngine(), CaptureEngine(preroll=0.3), ProcessCaptureEngine(preroll=0.3)):
+            self.assertIsNone(engine._stream)
+        self.assertEqual(CaptureEngine(preroll=0.3).preroll_seconds, 0.3)
+
+    def test_set_preroll(self):
+        engine = CaptureEngine()
+        engine.set_preroll(0.5)
+        self.assertEqual(engine.preroll_seconds, 0.5)
+        engine.set_preroll(None)
+        self.assertEqual(engine.preroll_seconds, 0.0)
+
+    def test_first_sample_delay_ignores_preroll(self):
+        engine = CaptureEngine(preroll=0.3)
+        pressed = time.perf_counter()
+        self.assertIsNone(engine.first_sample_delay(pressed))
+        engine._last_preroll_len = int(0.3 * engine.bytes_per_second)
+        engine._first_chunk_at = pressed + engine.chunk / engine.rate + 0.05
+        self.assertAlmostEqual(engine.first_sample_delay(pressed), 0.05, places=6)
+        self.assertAlmostEqual(engine.last_preroll_seconds, 0.3, places=3)
+
+
+class RingBufferTest(unittest.TestCase):
+    def test_keeps_the_most_recent_bytes(self):
+        ring = RingBuffer(8)
+        ring.write(b"abc")
+        self.assertEqual(ring.getvalue(), b"abc")
+        ring.write(b"defgh")
+        self.assertEqual(ring.getvalue(), b"abcdefgh")
+        ring.write(b"ijk")   # wraps
+        self.assertEqual(ring.getvalue(), b"defghijk")
+        self.assertEqual(len(ring), 8)
+
+    def test_oversized_write_and_clear(self):
+        ring = RingBuffer(4)
+        ring.write(b"x")
+        ring.write(b"0123456789")
+        self.assertEqual(ring.getvalue(), b"6789")
+        ring.clear()
+        self.assertEqual((ring.getvalue(), len(ring)), (b"", 0))
+
+    def test_zero_capacity(self):
+        ring = RingBuffer(0)
+        ring.write(b"abc")
+        self.assertEqual(ring.getvalue(), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
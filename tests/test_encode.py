@@ -0,0 +1,133 @@
+"""
+test_encode.py - PcmBuffer/SpoolBuffer WAV layout and spool recovery, in a temp directory.
+
+Usage:
+    python -m pytest tests
+"""
+
+import io
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.encode import WAV_HEADER_SIZE, PcmBuffer, SpoolBuffer, audio_duration, recover_spool  # noqa: E402
+
+RATE = 16000
+
+
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def read_wav(view):
+    with wave.open(io.BytesIO(bytes(view))) as w:
+        return w.getframerate(), w.getnchannels(), w.readframes(w.getnframes())
+
+
+class PcmBufferTest(unittest.TestCase):
+    def test_wav_header_is_written_in_place(self):
+        buffer = PcmBuffer(RATE)
+        buffer.extend(b"\x01\x02" * 100)
+        self.assertEqual(len(buffer), 200)
+        self.assertAlmostEqual(buffer.duration, 100 / RATE)
+        wav = buffer.wav()
+        self.assertEqual(len(wav), WAV_HEADER_SIZE + 200)
+        self.assertEqual(read_wav(wav), (RATE, 1, b"\x01\x02" * 100))
+
+    def test_trim_keeps_a_sub_range_without_copying(self):
+        buffer = PcmBuffer(RATE)
+        buffer.extend(bytes(range(200)))
+        buffer.trim(60, 160)
+        self.assertEqual(bytes(buffer.pcm()), bytes(range(60, 160)))
+        buffer.trim(20, 80)   # relative to the range kept so far
+        self.assertEqual(bytes(buffer.pcm()), bytes(range(80, 140)))
+        wav = buffer.wav()
+        self.assertEqual(read_wav(wav)[2], bytes(range(80, 140)))
+        self.assertIs(wav.obj, buffer._buf)
+
+
+class SpoolBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_spills_past_the_ram_window_and_cleans_up(self):
+        buffer = SpoolBuffer(RATE, spool_dir=self.dir, ram_seconds=0.1)
+        buffer.extend(b"\x03\x00" * 1000)
+        self.assertFalse(buffer.spooled)
+        buffer.extend(b"\x04\x00" * 1000)
+        self.assertTrue(buffer.spooled)
+        buffer.extend(b"\x05\x00" * 1000)
+        self.assertEqual(len(buffer), 6000)
+        pcm = b"\x03\x00" * 1000 + b"\x04\x00" * 1000 + b"\x05\x00" * 1000
+        wav = buffer.wav()
+        self.assertEqual(read_wav(wav), (RATE, 1, pcm))
+        del wav
+        path = buffer.path
+        buffer.close()
+        self.assertFalse(path.exists())
+
+    def test_stays_in_memory_without_a_spool_dir(self):
+        buffer = SpoolBuffer(RATE, ram_seconds=0.01)
+        buffer.extend(b"\x00" * 4000)
+        self.assertFalse(buffer.spooled)
+        self.assertEqual(len(buffer), 4000)
+
+
+class RecoverSpoolTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.spool_dir = self.dir / "spool"
+        self.buffer = SpoolBuffer(RATE, spool_dir=self.spool_dir, ram_seconds=0.1)
+        self.buffer.extend(b"\x01\x00" * RATE)   # 1 s: spills past 0.1 s
+
+    def tearDown(self):
+        self.buffer.close()
+        shutil.rmtree(self.dir)
+
+    def test_live_spool_is_left_alone(self):
+        self.assertTrue(self.buffer.spooled)
+        self.assertEqual(recover_spool(self.spool_dir, self.dir / "out"), [])
+        self.assertTrue(self.buffer.path.exists())
+
+    def test_crashed_spool_becomes_a_wav(self):
+        crashed = self.spool_dir / f"spool_20260101_120000_{dead_pid()}_x_y.wav"
+        shutil.copy(self.buffer.path, crashed)
+        recovered = recover_spool(self.spool_dir, self.dir / "out")
+        self.assertEqual([p.name for p in recovered], [f"recovered_{crashed.stem[len('spool_'):]}.wav"])
+        with wave.open(str(recovered[0])) as w:
+            self.assertEqual((w.getframerate(), w.getnchannels(), w.getnframes()), (RATE, 1, RATE))
+        self.assertTrue(self.buffer.path.exists())
+
+
+class AudioDurationTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_wav_header_and_size_estimate(self):
+        buffer = PcmBuffer(RATE)
+        buffer.extend(b"\x00\x00" * RATE * 2)
+        wav = self.dir / "two.wav"
+        wav.write_bytes(buffer.wav())
+        self.assertAlmostEqual(audio_duration(wav), 2.0)
+        unknown = self.dir / "clip.xyz"
+        unknown.write_bytes(b"\x00" * 4000)
+        self.assertAlmostEqual(audio_duration(unknown), 1.0)   # 32 kbit/s
+        self.assertIsNone(audio_duration(self.dir / "missing.xyz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+test_net.py - ApiClient policy tests against an in-process httpx MockTransport.
+
+Usage:
+    python -m pytest tests
+"""
+
+import asyncio
+import email.utils
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.net import ApiClient, CircuitBreaker, retry_after  # noqa: E402
+
+
+class RetryAfterTest(unittest.TestCase):
+    def check(self, value):
+        headers = {"retry-after": value} if value is not None else {}
+        return retry_after(httpx.Response(429, headers=headers))
+
+    def test_seconds_and_dates(self):
+        self.assertEqual(self.check("3"), 3.0)
+        self.assertEqual(self.check("-1"), 0.0)
+        self.assertAlmostEqual(self.check(email.utils.formatdate(time.time() + 30, usegmt=True)), 30, delta=2)
+        self.assertEqual(self.check(email.utils.formatdate(time.time() - 30, usegmt=True)), 0.0)
+
+    def test_missing_or_malformed(self):
+        self.assertIsNone(self.check(None))
+        self.assertIsNone(self.check("soon"))
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.changes = []
+        self.breaker = CircuitBreaker(threshold=2, cooldown=60.0, on_change=self.changes.append)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record(False)
+        self.breaker.record(True)    # a success resets the count
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, "closed")
+        self.breaker.record(False)
+        self.assertEqual(self.breaker.state, "open")
+        self.assertFalse(self.breaker.allow())
+        self.assertGreater(self.breaker.remaining(), 59)
+
+    def test_half_open_lets_one_trial_through(self):
+        self.breaker.record(False)
+        self.breaker.record(False)
+        self.breaker.cooldown = 0.0
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, "half-open")
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record(False)   # the trial failed: open again
+        self.assertEqual(self.breaker.state, "open")
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record(True)
+        self.assertEqual(self.changes, ["open", "half-open", "open", "half-open", "closed"])
+
+    def test_released_trial_can_be_retried(self):
+        self.breaker.record(False)
+        self.breaker.record(False)
+        self.breaker.cooldown = 0.0
+        self.assertTrue(self.breaker.allow())
+        self.breaker.release()
+        self.assertTrue(self.breaker.allow())
+
+
+class CancelledTrialTest(unittest.TestCase):
+    def setUp(self):
+        self.slow = True
+        self.started = threading.Event()
+
+        async def handler(request):
+            if self.slow:
+                self.started.set()
+                await asyncio.sleep(10)
+            return httpx.Response(200, json={"text": "ok"})
+
+        self.client = ApiClient(http2=False, retries=0)
+        self.client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_cancelled_half_open_trial_does_not_stick(self):
+        breaker = self.client.breaker
+        breaker.cooldown = 0.0
+        for _ in range(breaker.threshold):
+            breaker.record(False)
+        self.assertEqual(breaker.state, "open")
+
+        future = self.client.submit(b"RIFF", "key")
+        self.assertTrue(self.started.wait(5))
+        self.assertEqual(breaker.state, "half-open")
+        future.cancel()
+        time.sleep(0.1)   # let the cancellation reach the loop
+
+        self.slow = False
+        text, error = self.client.submit(b"RIFF", "key").result(5)
+        self.assertEqual((text, error), ("ok", None))
+        self.assertEqual(breaker.state, "closed")
+
+
+class HedgeTest(unittest.TestCase):
+    def setUp(self):
+        self.hedges = 0
+
+        async def slow(request):
+            await asyncio.sleep(10)
+            return httpx.Response(200, json={"text": "slow"})
+
+        async def fast(request):
+            self.hedges += 1
+            return httpx.Response(200, json={"text": "hedge"})
+
+        self.client = ApiClient(http2=False, retries=0)
+        self.client.hedge_delay = lambda bucket: 0.05
+        self.client._client = httpx.AsyncClient(transport=httpx.MockTransport(slow))
+        self.client._hedge_client = httpx.AsyncClient(transport=httpx.MockTransport(fast))
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_hedges_share_one_long_lived_client(self):
+        hedge_client = self.client._hedge_client
+        for _ in range(2):
+            self.assertEqual(self.client.submit(b"RIFF", "key", hedge=True).result(5), ("hedge", None))
+        self.assertEqual(self.hedges, 2)
+        self.assertIs(self.client._hedge_client, hedge_client)
+        self.assertFalse(hedge_client.is_closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+test_resample.py - Resampler streaming output matches a one-shot conversion.
+
+Usage:
+    python -m pytest tests
+"""
+
+import math
+import struct
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.resample import Resampler, can_resample  # noqa: E402
+
+
+def tone(seconds, rate, channels=2):
+    """440 Hz, 16-bit; the second channel (if any) at half the level."""
+    samples = []
+    for i in range(int(seconds * rate)):
+        v = int(8000 * math.sin(2 * math.pi * 440 * i / rate))
+        samples += (v, v // 2)[:channels]
+    return struct.pack(f"<{len(samples)}h", *samples)
+
+
+@unittest.skipUnless(can_resample(), "needs NumPy or audioop")
+class ResamplerTest(unittest.TestCase):
+    def convert(self, data, chunk_frames=None):
+        resampler = Resampler(48000, 2, 16000)
+        if chunk_frames is None:
+            return resampler.process(data)
+        step = chunk_frames * 4
+        return b"".join(resampler.process(data[i:i + step]) for i in range(0, len(data), step))
+
+    def test_chunked_matches_one_shot(self):
+        data = tone(0.5, 48000)
+        whole = self.convert(data)
+        self.assertAlmostEqual(len(whole) / 2, 16000 * 0.5, delta=2)
+        for frames in (1024, 1000, 333):
+            self.assertEqual(self.convert(data, frames), whole, frames)
+
+    def test_passthrough_and_reset(self):
+        same = Resampler(16000, 1, 16000)
+        self.assertTrue(same.passthrough)
+        self.assertEqual(same.process(b"\x01\x02"), b"\x01\x02")
+        resampler = Resampler(44100, 1, 16000)
+        data = tone(0.1, 44100, channels=1)
+        first = resampler.process(data)
+        resampler.reset()
+        self.assertEqual(resampler.process(data), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+test_vad.py - Speech/silence decisions on synthetic PCM.
+
+Usage:
+    python -m pytest tests
+"""
+
+import math
+import random
+import struct
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.encode import PcmBuffer  # noqa: E402
+from modules.vad import VoiceActivityDetector, speech_seconds, trim_silence  # noqa: E402
+
+RATE = 16000
+
+
+def tone(seconds, amplitude):
+    """16-bit mono sine at 220 Hz; amplitude is a fraction of full scale."""
+    n = int(seconds * RATE)
+    return struct.pack(f"<{n}h", *(int(amplitude * 32767 * math.sin(2 * math.pi * 220 * i / RATE))
+                                   for i in range(n)))
+
+
+def noise(seconds, level, seed=1):
+    """16-bit mono white noise with the given RMS as a fraction of full scale."""
+    rng = random.Random(seed)
+    n = int(seconds * RATE)
+    return struct.pack(f"<{n}h", *(max(-32768, min(32767, int(rng.gauss(0, level) * 32767)))
+                                   for _ in range(n)))
+
+
+class SpeechSecondsTest(unittest.TestCase):
+    def test_speech_from_start_to_end_counts_in_full(self):
+        self.assertAlmostEqual(speech_seconds(tone(1.0, 0.3), RATE), 1.0, places=2)
+        self.assertAlmostEqual(speech_seconds(tone(1.0, 0.3), RATE, floor=0.02), 1.0, places=2)
+
+    def test_room_noise_is_not_speech(self):
+        self.assertEqual(speech_seconds(tone(1.0, 0.002), RATE), 0.0)
+
+    def test_stored_floor_raises_the_threshold(self):
+        pcm = tone(0.5, 0.0) + tone(0.5, 0.02) + tone(0.5, 0.3)
+        self.assertAlmostEqual(speech_seconds(pcm, RATE), 1.0, places=1)
+        self.assertAlmostEqual(speech_seconds(pcm, RATE, floor=0.02), 0.5, places=1)
+
+    def test_noise_above_min_level_is_not_speech_with_a_floor(self):
+        pcm = noise(2.0, 0.012)
+        self.assertEqual(speech_seconds(pcm, RATE, floor=0.012), 0.0)
+        self.assertAlmostEqual(speech_seconds(pcm + tone(0.5, 0.3), RATE, floor=0.012), 0.5, places=1)
+
+
+class TrimSilenceTest(unittest.TestCase):
+    def trim(self, pcm, floor=None):
+        buffer = PcmBuffer(RATE)
+        buffer.extend(pcm)
+        cut = trim_silence(buffer, guard=0.0, floor=floor)
+        return cut, buffer.duration
+
+    def test_soft_leading_and_trailing_speech_is_kept(self):
+        pcm = tone(1.5, 0.06) + tone(1.0, 0.4) + tone(1.5, 0.06)
+        (lead, tail), kept = self.trim(pcm)
+        self.assertEqual((lead, tail), (0.0, 0.0))
+        self.assertAlmostEqual(kept, 4.0, places=2)
+        self.assertAlmostEqual(self.trim(pcm, floor=0.005)[1], 4.0, places=2)
+
+    def test_room_noise_around_speech_is_cut(self):
+        pcm = noise(1.0, 0.012) + tone(1.0, 0.3) + noise(1.0, 0.012)
+        (lead, tail), kept = self.trim(pcm, floor=0.012)
+        self.assertAlmostEqual(lead, 1.0, places=1)
+        self.assertAlmostEqual(tail, 1.0, places=1)
+        self.assertAlmostEqual(kept, 1.0, places=1)
+
+
+def feed(vad, pcm, chunk_seconds=0.02):
+    step = int(chunk_seconds * RATE) * 2
+    for i in range(0, len(pcm), step):
+        vad.process(pcm[i:i + step])
+
+
+class FloorTest(unittest.TestCase):
+    def test_calibrating_on_speech_keeps_speech_detectable(self):
+        vad = VoiceActivityDetector(RATE)
+        feed(vad, tone(3.0, 0.3))
+        self.assertLess(vad.threshold, 0.3 / math.sqrt(2))
+        self.assertTrue(vad.speaking)
+        self.assertFalse(vad.heard_quiet)
+
+    def test_calibrating_on_uneven_speech_is_capped(self):
+        vad = VoiceActivityDetector(RATE)
+        feed(vad, (tone(0.06, 0.3) + tone(0.04, 0.05)) * 5)   # talking, louder and softer
+        self.assertLessEqual(vad.floor, vad.min_level)
+
+    def test_steady_loud_room_becomes_the_floor(self):
+        vad = VoiceActivityDetector(RATE)
+        feed(vad, noise(3.0, 0.04))
+        self.assertGreater(vad.floor, 0.03)
+        self.assertFalse(vad.heard_speech)
+        self.assertGreater(vad.silence, 2.5)
+
+    def test_floor_ignores_levels_between_quiet_and_loud(self):
+        vad = VoiceActivityDetector(RATE, floor=0.002)
+        feed(vad, tone(5.0, 0.012))   # soft speech: under the threshold, above the quiet level
+        self.assertAlmostEqual(vad.floor, 0.002)
+
+    def test_floor_rise_is_capped(self):
+        vad = VoiceActivityDetector(RATE, floor=0.001, adapt=1.0, rise=0.5)
+        feed(vad, tone(1.0, 0.003))   # quiet chunks, 3x the floor
+        self.assertLessEqual(vad.floor, 0.001 * 1.01 ** 50 + 1e-9)
+        self.assertTrue(vad.heard_quiet)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,15 +7,19 @@ __version__ = "2.4.0"
 __author__ = "Anton AI Agent"
 
 import json
+import multiprocessing
 import re
-import shutil
-import struct
 import sys
-import tempfile
 import threading
 import time
 from pathlib import Path
 
+if __name__ == "__main__":
+    # Before anything else: in frozen builds the capture process re-runs this
+    # executable, and freeze_support() turns it into the child and exits, so
+    # none of the app setup below runs there.
+    multiprocessing.freeze_support()
+
 if sys.stdout:
     sys.stdout.reconfigure(line_buffering=True)
 if sys.stderr:
@@ -24,12 +28,11 @@ if sys.stderr:
 print("Loading Voice Type...")
 
 import keyboard
-import pyaudio
 import pyperclip
-import wave
 
 from modules.core import (
-    CONFIG_FILE, SAMPLE_RATE, DEFAULT_FILTER_WORDS,
+    CONFIG_FILE, DEFAULT_FILTER_WORDS, SPOOL_DIR, RECORDINGS_DIR,
+    MEETINGS_DIR,
     convert_numbers_to_digits,
     filter_text as _filter_text_core,
     normalize_numbers_from_api as _normalize_numbers_core,
@@ -41,7 +44,18 @@ from modules.features import (
     convert_emojis, auto_add_kaomoji, apply_macros, process_voice_commands,
 )
 from modules.history import save_to_history, update_stats, export_history
-from modules.audio import transcribe_with_groq, transcribe_audio_file
+from modules.audio import transcribe_audio_file
+from modules.backends import DEFAULT_BACKENDS, CloudBackend, RaceBackend, make_backend
+from modules.capture import CaptureEngine, RingBuffer
+from modules.capture_process import ProcessCaptureEngine
+from modules.devices import DeviceRegistry
+from modules.encode import SpoolBuffer, Encoder, save_wav, recover_spool
+from modules.meeting import MeetingTranscript, format_offset
+from modules.metering import peak
+from modules.metrics import Metrics
+from modules.net import ApiClient
+from modules.pipeline import SegmentPipeline, SegmentUploader
+from modules.vad import VoiceActivityDetector, speech_seconds, trim_silence
 from modules.ui import (
     FloatingWidget, create_tray_icon,
     show_shortcuts_overlay, show_snippets_popup, show_language_switcher,
@@ -67,6 +81,10 @@ DEFAULT_STATS = {
     "total_minutes": 0.0,
     "first_used": None,
     "last_used": None,
+    "input_overflows": 0,
+    "input_underruns": 0,
+    "input_dropped": 0,
+    "skipped_silent": 0,
 }
 
 # ---------------------------------------------------------------------------
@@ -75,6 +93,7 @@ DEFAULT_STATS = {
 config_data = {
     "api_key": "",
     "mic_index": None,
+    "mic_device": None,
     "hotkey": "shift",
     "accounting_mode": False,
     "history_enabled": True,
@@ -93,6 +112,34 @@ config_data = {
     "widget_position": None,
     "noise_threshold": 0.01,
     "recording_delay": 0.0,
+    "pre_roll": 0.3,
+    "upload_codec": "flac",
+    "trim_silence": True,
+    "trim_guard": 0.25,
+    "segment_uploads": True,
+    "segment_min_seconds": 10.0,
+    "segment_pause": 0.5,
+    "capture_process": False,
+    "capture_high_priority": False,
+    "http2": True,
+    "http_max_connections": 4,
+    "http_keepalive": 60.0,
+    "api_retries": 2,
+    "api_max_concurrent": 4,
+    "hedge_requests": False,
+    "backend": "groq",
+    "backends": {name: dict(profile) for name, profile in DEFAULT_BACKENDS.items()},
+    "race_backends": False,
+    "race_with": "local",
+    "race_max_seconds": 15.0,
+    "skip_silent": True,
+    "min_speech_seconds": 0.2,
+    "continuous_pause": 0.8,
+    "continuous_max_segment": 30.0,
+    "meeting_segment_seconds": 60.0,
+    "meeting_max_segment": 300.0,
+    "meeting_devices": [],
+    "vad_calibration": {},
     "auto_punctuation": True,
     "custom_vocabulary": [],
     "word_replacements": {},
@@ -156,6 +203,34 @@ KAOMOJI_MODE        = config_data.get("kaomoji_mode", False)
 MAX_HISTORY         = config_data.get("max_history", 100)
 AUTO_SAVE_TRANSCRIPTIONS = config_data.get("auto_save_transcriptions", True)
 PUNCTUATION         = config_data.get("punctuation", {})
+PRE_ROLL            = config_data.get("pre_roll", 0.3)
+UPLOAD_CODEC        = config_data.get("upload_codec", "flac")
+TRIM_SILENCE        = config_data.get("trim_silence", True)
+TRIM_GUARD          = config_data.get("trim_guard", 0.25)
+NOISE_THRESHOLD     = config_data.get("noise_threshold", 0.01)
+SEGMENT_UPLOADS     = config_data.get("segment_uploads", True)
+SEGMENT_MIN_SECONDS = config_data.get("segment_min_seconds", 10.0)
+SEGMENT_PAUSE       = config_data.get("segment_pause", 0.5)
+CAPTURE_PROCESS     = config_data.get("capture_process", False)
+CAPTURE_HIGH_PRIORITY = config_data.get("capture_high_priority", False)
+HTTP2               = config_data.get("http2", True)
+HTTP_MAX_CONNECTIONS = config_data.get("http_max_connections", 4)
+HTTP_KEEPALIVE      = config_data.get("http_keepalive", 60.0)
+API_RETRIES         = config_data.get("api_retries", 2)
+API_MAX_CONCURRENT  = config_data.get("api_max_concurrent", 4)
+HEDGE_REQUESTS      = config_data.get("hedge_requests", False)
+BACKEND             = config_data.get("backend", "groq")
+BACKENDS            = config_data.get("backends") or DEFAULT_BACKENDS
+RACE_BACKENDS       = config_data.get("race_backends", False)
+RACE_WITH           = config_data.get("race_with", "local")
+RACE_MAX_SECONDS    = config_data.get("race_max_seconds", 15.0)
+SKIP_SILENT         = config_data.get("skip_silent", True)
+MIN_SPEECH_SECONDS  = config_data.get("min_speech_seconds", 0.2)
+CONTINUOUS_PAUSE    = config_data.get("continuous_pause", 0.8)
+CONTINUOUS_MAX_SEGMENT = config_data.get("continuous_max_segment", 30.0)
+MEETING_SEGMENT_SECONDS = config_data.get("meeting_segment_seconds", 60.0)
+MEETING_MAX_SEGMENT = config_data.get("meeting_max_segment", 300.0)
+MEETING_DEVICES     = config_data.get("meeting_devices", [])
 
 # ---------------------------------------------------------------------------
 # Macros
@@ -196,11 +271,55 @@ print(f"[startup] Config file: {CONFIG_FILE}")
 class State:
     recording = False
     running   = True
+    continuous = False   # hands-free dictation (F4) is on
+    meeting = False      # meeting recording (tray menu) is on
+    hotkey_released = threading.Event()
+
 
 state = State()
 widget    = None
 tray_icon = None
 last_transcription = ""
+devices   = DeviceRegistry()
+device_lock = threading.Lock()   # one enumeration/reopen at a time: PortAudio init isn't thread-safe
+encoder   = Encoder()
+metrics   = Metrics()
+api_client = ApiClient(HTTP2, HTTP_MAX_CONNECTIONS, HTTP_KEEPALIVE, metrics=metrics,
+                       retries=API_RETRIES, max_concurrent=API_MAX_CONCURRENT)
+
+
+def new_capture_engine():
+    """In-process capture, or a separate capture process when capture_process is on."""
+    if CAPTURE_PROCESS:
+        return ProcessCaptureEngine(preroll=PRE_ROLL, high_priority=CAPTURE_HIGH_PRIORITY)
+    return CaptureEngine(preroll=PRE_ROLL)
+
+
+capture = new_capture_engine()
+
+
+def profile_backend(name):
+    """Backend for one named profile (Groq if it is missing or invalid)."""
+    profile = BACKENDS.get(name)
+    if profile is None:
+        print(f"[backend] No profile named {name!r}, using Groq")
+        profile = {"type": "groq"}
+    try:
+        return make_backend(profile, api_client, API_KEY, name)
+    except ValueError as e:
+        print(f"[backend] {e}, using Groq")
+        return make_backend({"type": "groq"}, api_client, API_KEY, name)
+
+
+def new_backend():
+    """The selected backend, raced against RACE_WITH for short audio when race_backends is on."""
+    main = profile_backend(BACKEND)
+    if not RACE_BACKENDS or RACE_WITH == BACKEND or RACE_WITH not in BACKENDS:
+        return main
+    return RaceBackend([main, profile_backend(RACE_WITH)], RACE_MAX_SECONDS, metrics)
+
+
+backend = new_backend()
 
 
 # ---------------------------------------------------------------------------
@@ -278,7 +397,20 @@ def on_settings_saved():
     global AUTOHIDE_ENABLED, COMPACT_MODE, ACCENT_COLOR, SAVE_AUDIO, AUTO_COPY
     global SHOW_TIMER, MINIMIZE_STARTUP, WIDGET_POSITION, CUSTOM_VOCABULARY
     global WORD_REPLACEMENTS, FILTER_WORDS, KAOMOJI_MODE, MAX_HISTORY
-    global AUTO_SAVE_TRANSCRIPTIONS, PUNCTUATION
+    global AUTO_SAVE_TRANSCRIPTIONS, PUNCTUATION, PRE_ROLL, UPLOAD_CODEC
+    global TRIM_SILENCE, TRIM_GUARD, NOISE_THRESHOLD
+    global SEGMENT_UPLOADS, SEGMENT_MIN_SECONDS, SEGMENT_PAUSE
+    global CAPTURE_PROCESS, CAPTURE_HIGH_PRIORITY, capture
+    global SKIP_SILENT, MIN_SPEECH_SECONDS, CONTINUOUS_PAUSE, CONTINUOUS_MAX_SEGMENT
+    global MEETING_SEGMENT_SECONDS, MEETING_MAX_SEGMENT, MEETING_DEVICES
+    global HTTP2, HTTP_MAX_CONNECTIONS, HTTP_KEEPALIVE, API_RETRIES, HEDGE_REQUESTS
+    global API_MAX_CONCURRENT, BACKEND, BACKENDS, backend
+    global RACE_BACKENDS, RACE_WITH, RACE_MAX_SECONDS
+
+    old_hotkey = HOTKEY
+    old_capture_mode = (CAPTURE_PROCESS, CAPTURE_HIGH_PRIORITY)
+    old_backend = (BACKEND, BACKENDS.get(BACKEND), API_KEY,
+                   RACE_BACKENDS, RACE_WITH, BACKENDS.get(RACE_WITH), RACE_MAX_SECONDS)
 
     API_KEY             = config_data.get("api_key", "")
     MIC_INDEX           = config_data.get("mic_index")
@@ -310,10 +442,132 @@ def on_settings_saved():
     MAX_HISTORY         = config_data.get("max_history", 100)
     AUTO_SAVE_TRANSCRIPTIONS = config_data.get("auto_save_transcriptions", True)
     PUNCTUATION         = config_data.get("punctuation", {})
+    PRE_ROLL            = config_data.get("pre_roll", 0.3)
+    UPLOAD_CODEC        = config_data.get("upload_codec", "flac")
+    TRIM_SILENCE        = config_data.get("trim_silence", True)
+    TRIM_GUARD          = config_data.get("trim_guard", 0.25)
+    NOISE_THRESHOLD     = config_data.get("noise_threshold", 0.01)
+    SEGMENT_UPLOADS     = config_data.get("segment_uploads", True)
+    SEGMENT_MIN_SECONDS = config_data.get("segment_min_seconds", 10.0)
+    SEGMENT_PAUSE       = config_data.get("segment_pause", 0.5)
+    CAPTURE_PROCESS     = config_data.get("capture_process", False)
+    CAPTURE_HIGH_PRIORITY = config_data.get("capture_high_priority", False)
+    HTTP2               = config_data.get("http2", True)
+    HTTP_MAX_CONNECTIONS = config_data.get("http_max_connections", 4)
+    HTTP_KEEPALIVE      = config_data.get("http_keepalive", 60.0)
+    API_RETRIES         = config_data.get("api_retries", 2)
+    API_MAX_CONCURRENT  = config_data.get("api_max_concurrent", 4)
+    HEDGE_REQUESTS      = config_data.get("hedge_requests", False)
+    BACKEND             = config_data.get("backend", "groq")
+    BACKENDS            = config_data.get("backends") or DEFAULT_BACKENDS
+    RACE_BACKENDS       = config_data.get("race_backends", False)
+    RACE_WITH           = config_data.get("race_with", "local")
+    RACE_MAX_SECONDS    = config_data.get("race_max_seconds", 15.0)
+    SKIP_SILENT         = config_data.get("skip_silent", True)
+    MIN_SPEECH_SECONDS  = config_data.get("min_speech_seconds", 0.2)
+    CONTINUOUS_PAUSE    = config_data.get("continuous_pause", 0.8)
+    CONTINUOUS_MAX_SEGMENT = config_data.get("continuous_max_segment", 30.0)
+    MEETING_SEGMENT_SECONDS = config_data.get("meeting_segment_seconds", 60.0)
+    MEETING_MAX_SEGMENT = config_data.get("meeting_max_segment", 300.0)
+    MEETING_DEVICES     = config_data.get("meeting_devices", [])
 
     if sys.platform == "win32" and "autostart" in config_data:
         set_autostart(config_data.get("autostart", False))
 
+    if HOTKEY != old_hotkey:
+        setup_hotkeys()
+    resolve_mic()
+    api_client.configure(HTTP2, HTTP_MAX_CONNECTIONS, HTTP_KEEPALIVE)
+    api_client.retries = API_RETRIES
+    api_client.max_concurrent = API_MAX_CONCURRENT
+    if (BACKEND, BACKENDS.get(BACKEND), API_KEY, RACE_BACKENDS, RACE_WITH,
+            BACKENDS.get(RACE_WITH), RACE_MAX_SECONDS) != old_backend:
+        backend.close()
+        backend = new_backend()
+        print(f"[backend] Using {backend.name}")
+        if not isinstance(backend, CloudBackend):
+            backend.warm()   # load a local model now rather than on the next dictation
+
+    if not state.recording:
+        if (CAPTURE_PROCESS, CAPTURE_HIGH_PRIORITY) != old_capture_mode:
+            capture.close()
+            capture = new_capture_engine()
+        capture.set_preroll(PRE_ROLL)
+        threading.Thread(target=warm_capture, daemon=True).start()
+
+
+def warm_capture():
+    """Open the capture stream for MIC_INDEX ahead of the first hotkey press."""
+    try:
+        capture.prepare(MIC_INDEX)
+    except Exception as e:
+        print(f"[capture] Could not open mic {MIC_INDEX}: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Input devices
+# ---------------------------------------------------------------------------
+
+def resolve_mic():
+    """Point MIC_INDEX at the configured device's current index, from the registry cache."""
+    global MIC_INDEX
+    key = config_data.get("mic_device")
+    index = devices.resolve(key, config_data.get("mic_index"))
+    if key is None and index is not None and index == config_data.get("mic_index"):
+        # Older config with only an index: pin it to the device it names today.
+        config_data["mic_device"] = devices.key_for(index)
+        try:
+            CONFIG_FILE.write_text(json.dumps(config_data))
+        except Exception as e:
+            print(f"[devices] Error saving mic: {e}")
+    if index != MIC_INDEX:
+        print(f"[devices] Mic index {MIC_INDEX} → {index}")
+    MIC_INDEX = index
+
+
+def rescan_devices():
+    """
+    Re-enumerate with no PyAudio alive (PortAudio rescans only then) and reopen
+    the mic. Recordings start their stream under device_lock too, so this
+    never closes one mid-start; returns False if a recording is running.
+    """
+    with device_lock:
+        if state.recording:
+            return False
+        capture.close()
+        devices.refresh()
+        resolve_mic()
+        warm_capture()
+    return True
+
+
+def on_devices_changed():
+    """Hot-plug callback from the registry's watcher thread."""
+    if state.recording:
+        return False  # retry after this recording
+    print("[devices] Audio devices changed, rescanning")
+    return rescan_devices()
+
+
+def list_input_devices():
+    """
+    Devices for the settings dialog, from the cache. Where hot-plug can't be
+    detected a rescan starts in the background (never on the Tk thread), so
+    a device plugged in since shows up the next time settings open.
+    """
+    if devices.ready and devices.hotplug is False and not state.recording:
+        threading.Thread(target=rescan_devices, name="device-rescan", daemon=True).start()
+    return devices.devices
+
+
+def start_devices():
+    """Startup: enumerate before the capture engine holds PortAudio, then open the mic."""
+    with device_lock:
+        devices.refresh()
+        resolve_mic()
+        warm_capture()
+    devices.watch(on_devices_changed)
+
 
 def on_stats_reset():
     global STATS
@@ -326,7 +580,14 @@ def on_stats_reset():
 
 def on_quit():
     state.running = False
+    state.continuous = False
+    state.meeting = False
     keyboard.unhook_all()
+    devices.stop()
+    capture.close()
+    encoder.shutdown()
+    backend.close()
+    api_client.close()
     if tray_icon:
         tray_icon.stop()
     widget.root.quit()
@@ -353,8 +614,11 @@ def _save_history(text):
 # type_text — orchestrator (reads many globals, calls feature/history modules)
 # ---------------------------------------------------------------------------
 
-def type_text(text):
-    """Normalise, filter, expand macros, handle commands, then type the text."""
+def type_text(text, trailing_space=False):
+    """
+    Normalise, filter, expand macros, handle commands, then type the text.
+    trailing_space separates consecutive hands-free segments.
+    """
     global last_transcription, STATS, HISTORY
 
     text = normalize_numbers_from_api(text)
@@ -397,7 +661,7 @@ def type_text(text):
                 old_clip = pyperclip.paste()
             except Exception:
                 pass
-        pyperclip.copy(text)
+        pyperclip.copy(text + " " if trailing_space else text)
         time.sleep(0.05)
         keyboard.press_and_release("ctrl+v")
         if not AUTO_COPY:
@@ -408,127 +672,326 @@ def type_text(text):
                 pass
 
 
+# ---------------------------------------------------------------------------
+# Voice activity detection
+# ---------------------------------------------------------------------------
+
+def _vad_device_key():
+    return devices.key_for(MIC_INDEX) or str(MIC_INDEX if MIC_INDEX is not None else 0)
+
+
+def new_vad(device_key=None):
+    """Create a VAD seeded with the device's stored noise floor (default: the main mic), if any."""
+    stored = config_data.get("vad_calibration", {}).get(device_key or _vad_device_key())
+    return VoiceActivityDetector(
+        capture.rate, capture.channels,
+        min_level=NOISE_THRESHOLD, floor=stored,
+    )
+
+
+def save_vad_calibration(vad, device_key=None):
+    """
+    Persist the session's noise floor for the device when it moved noticeably;
+    not from a session that never went quiet, whose floor may be speech.
+    """
+    if vad.floor is None or not vad.heard_quiet:
+        return
+    calibration = config_data.setdefault("vad_calibration", {})
+    key = device_key or _vad_device_key()
+    old = calibration.get(key)
+    if old and abs(vad.floor - old) / old < 0.2:
+        return
+    calibration[key] = round(vad.floor, 6)
+    try:
+        CONFIG_FILE.write_text(json.dumps(config_data))
+        print(f"[vad] Noise floor for mic {key}: {vad.floor:.4f}")
+    except Exception as e:
+        print(f"[vad] Error saving calibration: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Capture stats (lost input, silent clips)
+# ---------------------------------------------------------------------------
+
+GLITCH_STATS = ("input_overflows", "input_underruns", "input_dropped")
+
+
+def capture_counters(engine=None):
+    engine = engine or capture
+    return engine.overflows, engine.underruns, engine.dropped
+
+
+def record_capture_glitches(before, engine=None):
+    """Add overflows/underruns/dropped chunks since `before` to STATS and metrics."""
+    deltas = [now - then for now, then in zip(capture_counters(engine), before)]
+    if not any(deltas):
+        return
+    for key, delta in zip(GLITCH_STATS, deltas):
+        STATS[key] = STATS.get(key, 0) + delta
+        metrics.incr(key, delta)
+    print(f"[capture] Lost input this recording: {deltas[0]} overflows, "
+          f"{deltas[1]} underruns, {deltas[2]} dropped chunks")
+
+
+def count_silent_skip():
+    """Count a recording that was discarded before upload because it held no speech."""
+    STATS["skipped_silent"] = STATS.get("skipped_silent", 0) + 1
+    metrics.incr("skipped_silent")
+    try:
+        STATS_FILE.write_text(json.dumps(STATS, indent=2))
+    except Exception:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Upload metrics
+# ---------------------------------------------------------------------------
+
+def log_upload(encoded, request_seconds):
+    """Print and record bytes sent, encode time and request latency for one upload."""
+    metrics.observe("upload_bytes", encoded.size)
+    metrics.observe("encode_ms", encoded.encode_time * 1000)
+    metrics.observe("request_ms", request_seconds * 1000)
+    print(
+        f"[upload] {encoded.codec} {encoded.size / 1024:.1f} KB "
+        f"(raw {encoded.raw_size / 1024:.1f} KB), "
+        f"encode {encoded.encode_time * 1000:.0f} ms, "
+        f"request {request_seconds * 1000:.0f} ms"
+    )
+    http = api_client.stats()
+    warm = metrics.summary("upload_warm")
+    if http["requests"] > 1:
+        print(
+            f"[http] {http['reused']}/{http['requests']} requests reused a connection "
+            f"({http['reuse_rate']:.0%}, recent {warm.get('mean', 0):.0%}), "
+            f"~{http['saved_ms']:.0f} ms of handshakes saved "
+            f"(avg {http['handshake_ms']:.0f} ms, {'HTTP/2' if http['http2'] else 'HTTP/1.1'})"
+        )
+
+
+def log_local(audio_seconds, seconds):
+    """Print and record latency and real-time factor for one local transcription."""
+    metrics.observe("local_ms", seconds * 1000)
+    print(f"[local] {audio_seconds:.1f}s of audio in {seconds * 1000:.0f} ms "
+          f"({seconds / max(audio_seconds, 0.01):.2f}x real time, {backend.model})")
+
+
+def show_backend_problem():
+    """Show why the active backend can't transcribe on the widget; returns the reason or None."""
+    problem = backend.problem()
+    if problem == "No API key":
+        update_status("nokey", "Open Settings")
+    elif problem:
+        update_status("error", problem)
+    return problem
+
+
+def new_buffer():
+    """Recording buffer in the capture format; long recordings spill to SPOOL_DIR."""
+    return SpoolBuffer(capture.rate, capture.channels, capture.sample_width, spool_dir=SPOOL_DIR)
+
+
+def transcribe_buffer(audio, part=None, floor=None):
+    """
+    Trim, encode and upload one PcmBuffer, then close it. Returns (text, error).
+    `part` numbers segments of a long dictation; those run on the
+    SegmentUploader's threads. `floor` is the recording VAD's noise floor,
+    which sets the trimming threshold.
+    """
+    try:
+        return _transcribe_buffer(audio, part, floor)
+    finally:
+        audio.close()
+
+
+def _transcribe_buffer(audio, part, floor=None):
+    label = "" if part is None else f" segment {part}"
+    if TRIM_SILENCE:
+        lead, tail = trim_silence(audio, TRIM_GUARD, NOISE_THRESHOLD, floor)
+        metrics.observe("trimmed_seconds", lead + tail)
+        print(f"[trim]{label} Cut {lead + tail:.1f}s (lead {lead:.1f}s, tail {tail:.1f}s), "
+              f"uploading {audio.duration:.1f}s")
+
+    if backend.local:
+        # Nothing to upload: the model reads the WAV view of the buffer directly.
+        t0 = time.perf_counter()
+        text, error = backend.transcribe(audio.wav(), language=LANGUAGE,
+                                         custom_vocabulary=CUSTOM_VOCABULARY)
+        log_local(audio.duration, time.perf_counter() - t0)
+    else:
+        encoded = encoder.submit(audio, UPLOAD_CODEC).result()
+
+        t0 = time.perf_counter()
+        text, error = backend.transcribe(
+            encoded.payload, language=LANGUAGE,
+            custom_vocabulary=CUSTOM_VOCABULARY,
+            filename=encoded.filename, content_type=encoded.content_type,
+            audio_seconds=audio.duration,
+            hedge=HEDGE_REQUESTS and not state.meeting,   # meetings aren't waiting on the text
+            wav=audio.wav(),   # a local racer reads this instead of decoding the upload
+        )
+        log_upload(encoded, time.perf_counter() - t0)
+
+    if SAVE_AUDIO and text:
+        prefix = "recording" if part is None else f"recording_part{part}"
+        audio_file = save_wav(audio.wav(), RECORDINGS_DIR, prefix)
+        print(f"[audio] Saved to {audio_file}")
+    return text, error
+
+
+def polish_text(text):
+    """Sentence capitalisation, smart quotes and word replacements on a transcript."""
+    text = text.strip()
+
+    if CAPITALIZE_SENTENCES:
+        text = text[0].upper() + text[1:] if text else text
+        text = re.sub(
+            r"([.!?]\s+)([a-z])",
+            lambda m: m.group(1) + m.group(2).upper(),
+            text,
+        )
+
+    if SMART_QUOTES:
+        result = []
+        in_quote = False
+        for char in text:
+            if char == '"':
+                result.append('\u201d' if in_quote else '\u201c')
+                in_quote = not in_quote
+            else:
+                result.append(char)
+        text = "".join(result)
+
+    if WORD_REPLACEMENTS:
+        for old, new in WORD_REPLACEMENTS.items():
+            text = text.replace(old, new)
+    return text
+
+
 # ---------------------------------------------------------------------------
 # record_and_transcribe — top-level recording loop (stays here; touches widget
 # and many globals, so it doesn't belong in a sub-module)
 # ---------------------------------------------------------------------------
 
-def record_and_transcribe():
+def record_and_transcribe(pressed_at=None):
     """Record audio while hotkey is held, then transcribe with Groq Whisper."""
     global last_transcription, HISTORY, STATS
 
     if widget and widget.hidden:
         widget.root.after(0, widget.show_widget)
     update_status("recording", "Speak now...")
+    backend.warm()  # DNS/TCP/TLS (or the model load) overlaps with speaking instead of following release
     print("Recording...")
 
+    vad = None
+    segments = SegmentUploader(lambda segment, part: transcribe_buffer(segment, part, vad.floor))
+    audio = None
     try:
-        mic_idx = MIC_INDEX if MIC_INDEX is not None else 0
-        p = pyaudio.PyAudio()
-        chunk    = 1024
-        fmt      = pyaudio.paInt16
-        channels = 1
-        rate     = SAMPLE_RATE
-
-        stream = p.open(
-            format=fmt, channels=channels, rate=rate,
-            input=True, input_device_index=mic_idx,
-            frames_per_buffer=chunk,
-        )
-
-        frames = []
-        silence_start = None
-
-        while keyboard.is_pressed(HOTKEY):
-            data = stream.read(chunk, exception_on_overflow=False)
-            frames.append(data)
-
-            samples  = struct.unpack(f"<{len(data)//2}h", data)
-            max_samp = max(abs(s) for s in samples) if samples else 0
-            level    = min(max_samp / 32768.0, 1.0)
+        glitches_before = capture_counters()
+        with device_lock:
+            preroll = capture.start(MIC_INDEX)
+
+        audio = new_buffer()
+        audio.extend(preroll)
+        chunks = 0
+        segment_speech = False  # current segment contains speech
+        vad = new_vad()
+        step = capture.chunk * capture.channels * capture.sample_width
+        preroll_view = memoryview(preroll)
+        for i in range(0, len(preroll_view), step):  # pre-roll is mostly ambient: ideal for calibration
+            vad.process(preroll_view[i:i + step])
+
+        while not state.hotkey_released.is_set():
+            data = capture.read()
+            if data is None:
+                if not capture.recording:
+                    print("[capture] Input stream closed, stopping the recording")
+                    break
+                continue
+            audio.extend(data)
+            chunks += 1
+
+            if chunks == 1:
+                delay = capture.first_sample_delay(pressed_at)
+                if delay is not None:
+                    metrics.observe("first_sample_ms", delay * 1000)
+                    print(f"[latency] Hotkey → first sample: {delay * 1000:.0f} ms"
+                          f" (+{capture.last_preroll_seconds * 1000:.0f} ms pre-roll before the press)")
+
+            level = peak(data)
 
             if widget:
                 widget.root.after(0, lambda l=level: widget.update_level(l))
 
-            if AUTO_STOP:
-                if level > 0.02:
-                    silence_start = None
-                else:
-                    if silence_start is None:
-                        silence_start = time.time()
-                    elif time.time() - silence_start >= SILENCE_THRESHOLD:
-                        print(f"[auto-stop] {SILENCE_THRESHOLD}s silence detected")
-                        break
-
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
-
-        if len(frames) < 15:
+            if vad.process(data):
+                segment_speech = True
+            if AUTO_STOP and vad.silence >= SILENCE_THRESHOLD:
+                print(f"[auto-stop] {SILENCE_THRESHOLD}s silence detected "
+                      f"(floor {vad.floor:.4f}, threshold {vad.threshold:.4f})")
+                break
+
+            # Long dictation: cut at a natural pause and transcribe the finished
+            # part in the background, so release only waits for the last part.
+            if (SEGMENT_UPLOADS and backend.problem() is None and segment_speech
+                    and vad.silence >= SEGMENT_PAUSE
+                    and audio.duration >= SEGMENT_MIN_SECONDS):
+                segments.submit(audio)
+                print(f"[segment] Sent part {len(segments)} ({audio.duration:.1f}s) while recording")
+                audio = new_buffer()
+                segment_speech = False
+
+        for data in capture.stop():
+            audio.extend(data)
+            chunks += 1
+        if capture.converting:
+            metrics.observe("resample_ms", capture.convert_time * 1000)
+        record_capture_glitches(glitches_before)
+        save_vad_calibration(vad)
+
+        if chunks < 15:
             update_status("error", "Too short")
             time.sleep(1)
             widget.root.after(0, widget.hide_widget)
             state.recording = False
             return
 
-        if not API_KEY:
-            update_status("nokey", "Open Settings")
+        if SKIP_SILENT and not segments and not vad.heard_speech:
+            # The streaming VAD can miss speech if it calibrated on speech, so
+            # also check the whole clip before deciding it's only room noise.
+            voiced = speech_seconds(audio.pcm(), audio.rate, audio.channels, NOISE_THRESHOLD, vad.floor)
+            if voiced < MIN_SPEECH_SECONDS:
+                print(f"[skip] No speech detected ({voiced:.2f}s voiced), not uploading")
+                count_silent_skip()
+                update_status("error", "No speech")
+                time.sleep(1)
+                widget.root.after(0, widget.hide_widget)
+                state.recording = False
+                return
+
+        if show_backend_problem():
             time.sleep(2)
             widget.root.after(0, widget.hide_widget)
             state.recording = False
             return
 
         update_status("processing", "")
-
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            temp_path = f.name
-
-        wf = wave.open(temp_path, "wb")
-        wf.setnchannels(channels)
-        wf.setsampwidth(p.get_sample_size(fmt))
-        wf.setframerate(rate)
-        wf.writeframes(b"".join(frames))
-        wf.close()
-
-        text, error = transcribe_with_groq(
-            temp_path, API_KEY, language=LANGUAGE,
-            custom_vocabulary=CUSTOM_VOCABULARY,
-        )
-
-        if SAVE_AUDIO and text:
-            audio_dir = Path.home() / "VoiceType Recordings"
-            audio_dir.mkdir(exist_ok=True)
-            audio_file = audio_dir / f"recording_{time.strftime('%Y%m%d_%H%M%S')}.wav"
-            shutil.copy(temp_path, audio_file)
-            print(f"[audio] Saved to {audio_file}")
-
-        Path(temp_path).unlink(missing_ok=True)
+        released_at = time.perf_counter()
+        if not segments:
+            text, error = transcribe_buffer(audio, floor=vad.floor)
+        else:
+            # Only the final part is uploaded now; earlier parts are done or in flight.
+            if segment_speech:
+                text, error = transcribe_buffer(audio, len(segments) + 1, vad.floor)
+            else:
+                text, error = None, None
+            earlier, earlier_error = segments.collect()
+            text = " ".join(t.strip() for t in (earlier, text) if t and t.strip()) or None
+            error = earlier_error or error
+            metrics.observe("segments", len(segments) + (1 if segment_speech else 0))
+        metrics.observe("release_to_text_ms", (time.perf_counter() - released_at) * 1000)
 
         if text:
-            text = text.strip()
-
-            if CAPITALIZE_SENTENCES:
-                text = text[0].upper() + text[1:] if text else text
-                text = re.sub(
-                    r"([.!?]\s+)([a-z])",
-                    lambda m: m.group(1) + m.group(2).upper(),
-                    text,
-                )
-
-            if SMART_QUOTES:
-                result = []
-                in_quote = False
-                for char in text:
-                    if char == '"':
-                        result.append('\u201d' if in_quote else '\u201c')
-                        in_quote = not in_quote
-                    else:
-                        result.append(char)
-                text = "".join(result)
-
-            if WORD_REPLACEMENTS:
-                for old, new in WORD_REPLACEMENTS.items():
-                    text = text.replace(old, new)
+            text = polish_text(text)
 
             print(f"[whisper] {text}")
             last_transcription = text
@@ -559,54 +1022,423 @@ def record_and_transcribe():
             threading.Thread(target=hide_after_error, daemon=True).start()
 
     except Exception as e:
+        capture.reset()
+        update_status("error", str(e)[:30])
+        print(f"Error: {e}")
+        time.sleep(1.5)
+        widget.root.after(0, widget.hide_widget)
+    finally:
+        segments.close()
+        if audio is not None:
+            audio.close()
+        state.recording = False
+
+
+# ---------------------------------------------------------------------------
+# Hands-free dictation (F4): the stream stays open, speech is cut into
+# utterances by the VAD, and each one is uploaded → post-processed → typed
+# through a SegmentPipeline while the next is being recorded.
+# ---------------------------------------------------------------------------
+
+CONTINUOUS_LEAD_IN = 0.3   # seconds kept from before the VAD's speech onset
+
+
+def toggle_continuous():
+    """F4: start hands-free dictation, or stop it after the current utterance."""
+    if state.continuous:
+        state.continuous = False
+        return
+    if state.recording:
+        return
+    state.recording = True   # push-to-talk and the device watcher wait for us
+    state.continuous = True
+    threading.Thread(target=continuous_dictation, daemon=True).start()
+
+
+def deliver_segment(text, error, part):
+    """Post-process and type one hands-free utterance (pipeline delivery thread)."""
+    global last_transcription
+
+    if not text or not text.strip():
+        if error:
+            print(f"[hands-free] Part {part} failed: {error}")
+            update_status("error", error)
+        return
+    text = polish_text(text)
+    print(f"[whisper] {text}")
+    last_transcription = text
+    if AUTO_COPY:
+        pyperclip.copy(text)
+    if state.continuous:
+        update_status("recording", text)
+    type_text(text, trailing_space=True)
+
+
+def continuous_dictation():
+    """Listen until F4 is pressed again, sending each utterance as it ends."""
+    if widget and widget.hidden:
+        widget.root.after(0, widget.show_widget)
+    if show_backend_problem():
+        time.sleep(2)
+        widget.root.after(0, widget.hide_widget)
+        state.continuous = False
+        state.recording = False
+        return
+    update_status("recording", "Hands-free: speak, F4 to stop")
+    backend.warm()
+    print("[hands-free] On")
+
+    vad = None
+    pipeline = SegmentPipeline(lambda segment, part: transcribe_buffer(segment, part, vad.floor),
+                               deliver_segment)
+    audio = None
+    try:
+        glitches_before = capture_counters()
+        lead_in = RingBuffer(int(CONTINUOUS_LEAD_IN * capture.rate) * capture.channels * capture.sample_width)
+        with device_lock:
+            lead_in.write(capture.start(MIC_INDEX))
+        vad = new_vad()
+
+        def send(segment):
+            voiced = speech_seconds(segment.pcm(), segment.rate, segment.channels,
+                                    NOISE_THRESHOLD, vad.floor)
+            if SKIP_SILENT and voiced < MIN_SPEECH_SECONDS:
+                print(f"[skip] Utterance with {voiced:.2f}s voiced, not uploading")
+                count_silent_skip()
+                segment.close()
+                return
+            pipeline.submit(segment)
+            print(f"[hands-free] Sent part {len(pipeline)} ({segment.duration:.1f}s)")
+
+        while state.continuous and state.running:
+            data = capture.read()
+            if data is None:
+                if not capture.recording:
+                    print("[hands-free] Input stream closed, stopping")
+                    break
+                continue
+            level = peak(data)
+            if widget:
+                widget.root.after(0, lambda l=level: widget.update_level(l))
+
+            speaking = vad.process(data)
+            if audio is None:
+                if not speaking:
+                    lead_in.write(data)
+                    continue
+                audio = new_buffer()
+                audio.extend(lead_in.getvalue())
+                lead_in.clear()
+            audio.extend(data)
+
+            if (vad.silence >= CONTINUOUS_PAUSE
+                    or audio.duration >= CONTINUOUS_MAX_SEGMENT):
+                segment, audio = audio, None
+                send(segment)
+
+        for data in capture.stop():
+            if audio is not None:
+                audio.extend(data)
+        if audio is not None:
+            segment, audio = audio, None
+            send(segment)
+        if capture.converting:
+            metrics.observe("resample_ms", capture.convert_time * 1000)
+        record_capture_glitches(glitches_before)
+        save_vad_calibration(vad)
+
+        print(f"[hands-free] Off, waiting for {len(pipeline)} parts")
+        update_status("processing", "")
+        pipeline.close()
+        metrics.observe("segments", len(pipeline))
+        update_status("done", last_transcription or "")
+        time.sleep(2)
+        if widget and AUTOHIDE_ENABLED:
+            widget.root.after(0, widget.hide_widget)
+
+    except Exception as e:
+        capture.reset()
         update_status("error", str(e)[:30])
         print(f"Error: {e}")
         time.sleep(1.5)
         widget.root.after(0, widget.hide_widget)
     finally:
+        pipeline.close()
+        if audio is not None:
+            audio.close()
+        state.continuous = False
+        state.recording = False
+
+
+# ---------------------------------------------------------------------------
+# Meeting mode (tray menu): hours of audio as a run of on-disk segments,
+# transcribed while the meeting goes on into a timestamped transcript file.
+# ---------------------------------------------------------------------------
+
+# 16 kHz mono WAV is 1.9 MB/min, so 10 min stays under the 25 MB upload limit
+# even when the upload codec falls back to WAV.
+MEETING_SEGMENT_CAP = 600.0
+
+
+def toggle_meeting():
+    """Start meeting recording, or stop it (the last segment is still transcribed)."""
+    if state.meeting:
+        state.meeting = False
+        return
+    if state.recording:
+        print("[meeting] Finish the current recording first")
+        return
+    state.recording = True
+    state.meeting = True
+    threading.Thread(target=record_meeting, daemon=True).start()
+
+
+def meeting_sources():
+    """
+    (engine, mic index, device key, label) for each meeting microphone: the
+    main mic on the shared engine, plus every connected meeting_devices entry
+    on an engine of its own. The extra engines are opened here, one at a time
+    under device_lock, before any recording thread starts.
+    """
+    main_key = devices.key_for(MIC_INDEX)
+    main = devices.find(main_key) if main_key else None
+    sources = [(capture, MIC_INDEX, main_key, main.name if main else "Mic")]
+    for key in MEETING_DEVICES:
+        dev = devices.find(key)
+        if dev is None:
+            print(f"[meeting] {key} is not connected, skipping it")
+        elif key != main_key:
+            engine = new_capture_engine()
+            try:
+                with device_lock:
+                    engine.prepare(dev.index)
+            except Exception as e:
+                print(f"[meeting] Could not open {dev.name}, skipping it: {e}")
+                engine.close()
+                continue
+            sources.append((engine, dev.index, key, dev.name))
+    return sources
+
+
+def record_meeting():
+    """Record until stopped, cutting segments at pauses and transcribing them as they close."""
+    if backend.problem():
+        if widget and widget.hidden:
+            widget.root.after(0, widget.show_widget)
+        show_backend_problem()
+        state.meeting = False
+        state.recording = False
+        return
+
+    transcript = None
+    try:
+        transcript = MeetingTranscript(MEETINGS_DIR)
+        sources = meeting_sources()
+    except Exception as e:
+        print(f"[meeting] Could not start: {e}")
+        update_status("error", str(e)[:30])
+        if transcript is not None:
+            transcript.close(0)
+        state.meeting = False
+        state.recording = False
+        return
+    multi = len(sources) > 1
+    parts = {}   # part -> (offset of its first sample in seconds, source label, VAD floor)
+    submit_lock = threading.Lock()   # parts are numbered in submission order
+    print(f"[meeting] Recording from {len(sources)} mic(s), transcript: {transcript.path}")
+    update_status("recording", "Meeting: recording")
+    backend.warm()
+
+    def transcribe_part(audio, part):
+        try:
+            text, error = _transcribe_buffer(audio, part, parts[part][2])
+            if not (text and text.strip()) and error:
+                path = save_wav(audio.wav(), transcript.audio_dir, f"part{part}")
+                error = f"{error}; audio kept in {path.name}"
+            return text, error
+        finally:
+            audio.close()
+
+    def deliver(text, error, part):
+        offset, label, _ = parts.pop(part)
+        source = label if multi else None
+        if text and text.strip():
+            transcript.append(offset, text, source)
+            print(f"[meeting] Part {part} transcribed")
+        elif error:
+            transcript.append_failure(offset, error, source)
+            print(f"[meeting] Part {part} failed: {error}")
+        if state.meeting:
+            update_status("recording", f"Meeting: {transcript.segments} parts transcribed")
+
+    # One pipeline for every mic: its workers bound the concurrent uploads and
+    # its queue bound the waiting segments however many mics there are.
+    # Segments are on disk, so many can wait without costing memory.
+    pipeline = SegmentPipeline(transcribe_part, deliver, workers=2, max_pending=16 * len(sources))
+    max_segment = min(MEETING_MAX_SEGMENT, MEETING_SEGMENT_CAP)
+    elapsed = [0.0] * len(sources)
+
+    def record_source(n, engine, mic_idx, device_key, label):
+        audio = None
+        segment_start = 0.0
+        bytes_per_second = engine.rate * engine.channels * engine.sample_width
+        tag = f"[meeting] {label}:" if multi else "[meeting]"
+
+        def close_segment(segment):
+            voiced = speech_seconds(segment.pcm(), segment.rate, segment.channels,
+                                    NOISE_THRESHOLD, vad.floor)
+            if SKIP_SILENT and voiced < MIN_SPEECH_SECONDS:
+                print(f"{tag} Silent segment at {format_offset(segment_start)}, skipped")
+                count_silent_skip()
+                segment.close()
+                return
+            # Wait for a slot outside the lock: a backed-up pipeline stalls this
+            # mic only, not the other mics' read loops.
+            pipeline.reserve()
+            with submit_lock:
+                part = len(pipeline) + 1
+                parts[part] = (segment_start, label, vad.floor)
+                pipeline.submit(segment, reserved=True)
+            print(f"{tag} Part {part} closed at {format_offset(elapsed[n])} ({segment.duration:.0f}s)")
+
+        try:
+            glitches_before = capture_counters(engine)
+            with device_lock:
+                engine.start(mic_idx)
+            vad = new_vad(device_key)
+
+            while state.meeting and state.running:
+                data = engine.read()
+                if data is None:
+                    if not engine.recording:
+                        print(f"{tag} Input stream closed, stopping this mic")
+                        break
+                    continue
+                if audio is None:
+                    audio = SpoolBuffer(engine.rate, engine.channels, engine.sample_width,
+                                        spool_dir=SPOOL_DIR, ram_seconds=5.0)
+                    segment_start = elapsed[n]
+                audio.extend(data)
+                elapsed[n] += len(data) / bytes_per_second
+                vad.process(data)
+
+                if ((audio.duration >= MEETING_SEGMENT_SECONDS and vad.silence >= SEGMENT_PAUSE)
+                        or audio.duration >= max_segment):
+                    segment, audio = audio, None
+                    close_segment(segment)
+
+            for data in engine.stop():
+                if audio is not None:
+                    audio.extend(data)
+            if audio is not None:
+                segment, audio = audio, None
+                close_segment(segment)
+            record_capture_glitches(glitches_before, engine)
+            save_vad_calibration(vad, device_key)
+        except Exception as e:
+            engine.reset()
+            print(f"{tag} Error: {e}")
+            if n == 0:
+                update_status("error", str(e)[:30])
+                state.meeting = False
+        finally:
+            if audio is not None:
+                audio.close()
+            if engine is not capture:
+                engine.close()
+
+    threads = [
+        threading.Thread(target=record_source, args=(n, *source), name=f"meeting-{n}", daemon=True)
+        for n, source in enumerate(sources)
+    ]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        duration = max(elapsed)
+        print(f"[meeting] Stopped after {format_offset(duration)}, finishing {len(parts)} parts")
+        update_status("processing", "")
+        pipeline.close()
+        transcript.close(duration)
+        print(f"[meeting] Transcript complete: {transcript.path}")
+        update_status("done", f"Transcript saved\n{transcript.path.name}")
+    finally:
+        pipeline.close()
+        transcript.close(max(elapsed))
+        state.meeting = False
         state.recording = False
 
 
 # ---------------------------------------------------------------------------
-# Hotkey polling loop
+# Hotkey hooks (key-down/key-up events; nothing runs while keys are idle)
 # ---------------------------------------------------------------------------
 
-def hotkey_loop():
-    """Poll hotkey and function keys at 50 Hz."""
-    was_pressed = False
-    while state.running:
-        is_pressed = keyboard.is_pressed(HOTKEY)
-        if is_pressed and not was_pressed and not state.recording:
-            was_pressed = True
-            state.recording = True
-            threading.Thread(target=record_and_transcribe, daemon=True).start()
-        elif not is_pressed and was_pressed:
-            was_pressed = False
+hotkey_hooks = []
+held_keys = set()   # keys currently down, to ignore auto-repeat key-downs
 
-        if keyboard.is_pressed("f1") and not shortcuts_visible():
-            keyboard.release("f1")
-            time.sleep(0.1)
-            threading.Thread(
-                target=show_shortcuts_overlay, args=(HOTKEY,), daemon=True
-            ).start()
 
-        if keyboard.is_pressed("f2") and not snippets_visible():
-            keyboard.release("f2")
-            time.sleep(0.1)
-            threading.Thread(
-                target=show_snippets_popup, args=(QUICK_SNIPPETS, type_text), daemon=True
-            ).start()
+def _hook_key(name, on_down, on_up=None):
+    """Register key-down/up handlers; they run on keyboard's listener thread."""
+    def down(_event):
+        if name in held_keys:
+            return
+        held_keys.add(name)
+        on_down()
 
-        if keyboard.is_pressed("f3") and not language_switcher_visible():
-            keyboard.release("f3")
-            time.sleep(0.1)
-            threading.Thread(
-                target=show_language_switcher,
-                args=(config_data, on_language_change),
-                daemon=True,
-            ).start()
+    def up(_event):
+        held_keys.discard(name)
+        if on_up:
+            on_up()
 
-        time.sleep(0.02)
+    hotkey_hooks.append(keyboard.on_press_key(name, down))
+    hotkey_hooks.append(keyboard.on_release_key(name, up))
+
+
+def on_hotkey_press():
+    """Start a recording on HOTKEY key-down."""
+    if state.recording:
+        return
+    pressed_at = time.perf_counter()
+    state.recording = True
+    state.hotkey_released.clear()
+    threading.Thread(target=record_and_transcribe, args=(pressed_at,), daemon=True).start()
+
+
+def _open_popup(is_visible, target, *args):
+    def handler():
+        if not is_visible():
+            threading.Thread(target=target, args=args, daemon=True).start()
+    return handler
+
+
+def _unmodified(on_down):
+    """Skip the handler when Alt or Ctrl is held, so Alt+F4 and the like keep their usual meaning."""
+    def handler():
+        if not (keyboard.is_pressed("alt") or keyboard.is_pressed("ctrl")):
+            on_down()
+    return handler
+
+
+def setup_hotkeys():
+    """Hook HOTKEY, the F1-F3 popups and the F4 hands-free toggle, replacing any previous hooks."""
+    teardown_hotkeys()
+    _hook_key(HOTKEY, on_hotkey_press, state.hotkey_released.set)
+    _hook_key("f1", _open_popup(shortcuts_visible, show_shortcuts_overlay, HOTKEY))
+    _hook_key("f2", _open_popup(snippets_visible, show_snippets_popup, QUICK_SNIPPETS, type_text))
+    _hook_key("f3", _open_popup(language_switcher_visible, show_language_switcher,
+                                config_data, on_language_change))
+    _hook_key("f4", _unmodified(toggle_continuous))
+
+
+def teardown_hotkeys():
+    """Remove the hooks installed by setup_hotkeys."""
+    while hotkey_hooks:
+        keyboard.unhook(hotkey_hooks.pop())
+    if held_keys:
+        state.hotkey_released.set()  # don't leave a recording waiting for a key-up
+        held_keys.clear()
 
 
 # ---------------------------------------------------------------------------
@@ -631,6 +1463,9 @@ def main():
         print("Get free key: https://console.groq.com/keys")
     else:
         print(f"API key loaded ({len(API_KEY)} chars)")
+    print(f"Backend: {backend.name} ({backend.problem() or 'ready'})")
+    if not isinstance(backend, CloudBackend):
+        backend.warm()  # the first model load takes seconds
 
     if MACROS:
         print(f"Macros loaded: {len(MACROS)}")
@@ -639,14 +1474,19 @@ def main():
         "get_last_transcription": lambda: last_transcription,
         "get_history":            lambda: HISTORY,
         "get_stats":              lambda: STATS,
+        "get_input_devices":      list_input_devices,
         "on_stats_reset":         on_stats_reset,
         "on_settings_saved":      on_settings_saved,
         "transcribe_file":        lambda: transcribe_audio_file(
-            API_KEY, LANGUAGE, CAPITALIZE_SENTENCES, AUTOHIDE_ENABLED,
+            backend, LANGUAGE, CAPITALIZE_SENTENCES, AUTOHIDE_ENABLED,
             widget, type_text, _save_history, update_status,
             custom_vocabulary=CUSTOM_VOCABULARY,
+            trim_guard=TRIM_GUARD if TRIM_SILENCE else None,
+            noise_threshold=NOISE_THRESHOLD, upload_codec=UPLOAD_CODEC,
         ),
         "export_history":         lambda: export_history(HISTORY),
+        "toggle_meeting":         toggle_meeting,
+        "meeting_active":         lambda: state.meeting,
         "on_quit":                on_quit,
     }
 
@@ -660,7 +1500,10 @@ def main():
     widget.tray_icon = tray_icon
     threading.Thread(target=tray_icon.run, daemon=True).start()
 
-    threading.Thread(target=hotkey_loop, daemon=True).start()
+    recover_spool(SPOOL_DIR, RECORDINGS_DIR)
+
+    threading.Thread(target=start_devices, daemon=True).start()
+    setup_hotkeys()
 
     print(f"\nReady! Hold {HOTKEY.upper()} to record.")
 
@@ -6,9 +6,7 @@ Uses Groq Whisper API for fast, accurate speech-to-text.
 import sys
 import threading
 import time
-import tempfile
 import re
-from pathlib import Path
 
 if sys.stdout:
     sys.stdout.reconfigure(line_buffering=True)
@@ -19,17 +17,20 @@ import keyboard
 import pyperclip
 import tkinter as tk
 import pyaudio
-import wave
 import webbrowser
 
 from modules.core import (
-    CONFIG_FILE, SAMPLE_RATE, DEFAULT_FILTER_WORDS,
+    CONFIG_FILE, DEFAULT_FILTER_WORDS, SPOOL_DIR, RECORDINGS_DIR,
     load_config, save_config,
     transcribe_with_groq as _transcribe_core,
     convert_numbers_to_digits,
     filter_text as _filter_text_core,
     apply_casual_mode as _apply_casual_mode_core,
 )
+from modules.capture import CaptureEngine
+from modules.encode import SpoolBuffer, recover_spool
+from modules.net import ApiClient
+from modules.vad import speech_seconds
 
 print("Ready!")
 
@@ -52,6 +53,10 @@ print(f"[startup] MIC_INDEX: {MIC_INDEX}")
 recording = False
 running = True
 settings_open = False
+hotkey_released = threading.Event()
+hotkey_hooks = []
+capture = CaptureEngine(chunk=512, preroll=config_data.get("pre_roll", 0.3))
+api_client = ApiClient(http2=config_data.get("http2", True), max_connections=2)
 
 
 class FloatingWidget:
@@ -320,7 +325,7 @@ class FloatingWidget:
 
             new_hotkey = hotkey_var.get().lower()
             if new_hotkey and new_hotkey != "...":
-                keyboard.unhook_all_hotkeys()
+                teardown_hotkey()
                 HOTKEY = new_hotkey
                 setup_hotkey()
                 print(f"[save] Hotkey: {HOTKEY}")
@@ -345,6 +350,9 @@ class FloatingWidget:
             config_data["filter_words"] = FILTER_WORDS
             config_data["theme"] = THEME
 
+            if not recording:
+                threading.Thread(target=warm_capture, daemon=True).start()
+
             try:
                 save_config(config_data)
                 print(f"[save] Saved to {CONFIG_FILE}")
@@ -370,6 +378,7 @@ class FloatingWidget:
             global running
             running = False
             keyboard.unhook_all()
+            capture.close()
             win.destroy()
             self.root.quit()
             sys.exit(0)
@@ -395,6 +404,8 @@ class FloatingWidget:
         global running
         running = False
         keyboard.unhook_all()
+        capture.close()
+        api_client.close()
         self.root.quit()
         sys.exit(0)
 
@@ -422,9 +433,9 @@ class FloatingWidget:
 widget = None
 
 
-def transcribe_with_groq(audio_path):
+def transcribe_with_groq(audio, audio_seconds=None):
     """Use Groq Whisper API via core module."""
-    return _transcribe_core(audio_path, API_KEY)
+    return _transcribe_core(audio, API_KEY, client=api_client, audio_seconds=audio_seconds)
 
 
 def convert_numbers(text):
@@ -458,7 +469,7 @@ def type_text(text):
     keyboard.press_and_release("ctrl+v")
 
 
-def record_and_transcribe():
+def record_and_transcribe(pressed_at=None):
     global recording
     
     if widget.hidden:
@@ -466,35 +477,50 @@ def record_and_transcribe():
     widget.update_status("recording")
     print("Recording...")
 
+    audio = None
     try:
-        mic_idx = MIC_INDEX if MIC_INDEX is not None else 0
-        p = pyaudio.PyAudio()
-        
-        chunk = 512
-        stream = p.open(format=pyaudio.paInt16, channels=1, rate=SAMPLE_RATE,
-                       input=True, input_device_index=mic_idx, frames_per_buffer=chunk)
+        preroll = capture.start(MIC_INDEX)
 
-        frames = []
+        audio = SpoolBuffer(capture.rate, capture.channels, capture.sample_width,
+                            spool_dir=SPOOL_DIR)
+        audio.extend(preroll)
+        chunks = 0
         start_time = time.time()
 
-        while keyboard.is_pressed(HOTKEY):
-            data = stream.read(chunk, exception_on_overflow=False)
-            frames.append(data)
+        while not hotkey_released.is_set():
+            data = capture.read()
+            if data is not None:
+                audio.extend(data)
+                chunks += 1
+        for data in capture.stop():
+            audio.extend(data)
+            chunks += 1
 
         duration = time.time() - start_time
-        print(f"Recorded {duration:.1f}s")
-
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
+        delay = capture.first_sample_delay(pressed_at)
+        if delay is not None:
+            print(f"Recorded {duration:.1f}s (first sample after {delay * 1000:.0f} ms)")
+        else:
+            print(f"Recorded {duration:.1f}s")
 
-        if len(frames) < 10:
+        if chunks < 10:
             widget.update_status("error", "Too short")
             time.sleep(1)
             widget.root.after(0, widget.hide_widget)
             recording = False
             return
 
+        if config_data.get("skip_silent", True):
+            voiced = speech_seconds(audio.pcm(), audio.rate, audio.channels,
+                                    config_data.get("noise_threshold", 0.01))
+            if voiced < config_data.get("min_speech_seconds", 0.2):
+                print(f"[skip] No speech detected ({voiced:.2f}s voiced), not uploading")
+                widget.update_status("error", "No speech")
+                time.sleep(1)
+                widget.root.after(0, widget.hide_widget)
+                recording = False
+                return
+
         if not API_KEY:
             widget.update_status("nokey")
             time.sleep(2)
@@ -504,18 +530,7 @@ def record_and_transcribe():
 
         widget.update_status("processing")
 
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
-            temp_path = f.name
-
-        wf = wave.open(temp_path, "wb")
-        wf.setnchannels(1)
-        wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))
-        wf.setframerate(SAMPLE_RATE)
-        wf.writeframes(b"".join(frames))
-        wf.close()
-
-        text, error = transcribe_with_groq(temp_path)
-        Path(temp_path).unlink(missing_ok=True)
+        text, error = transcribe_with_groq(audio.wav(), audio.duration)
 
         if text:
             text = text.strip()
@@ -531,27 +546,47 @@ def record_and_transcribe():
             widget.root.after(0, widget.hide_widget)
 
     except Exception as e:
+        capture.reset()
         print(f"Error: {e}")
         widget.update_status("error", str(e)[:20])
         time.sleep(1.5)
         widget.root.after(0, widget.hide_widget)
     finally:
+        if audio is not None:
+            audio.close()
         recording = False
 
 
+def warm_capture():
+    """Open the capture stream for MIC_INDEX ahead of the first hotkey press."""
+    try:
+        capture.prepare(MIC_INDEX)
+    except Exception as e:
+        print(f"[capture] Could not open mic {MIC_INDEX}: {e}")
+
+
 def on_hotkey_press():
     """Called when hotkey is pressed."""
     global recording
     if not recording:
         recording = True
+        hotkey_released.clear()
+        pressed_at = time.perf_counter()
         print(f"[hotkey] {HOTKEY} pressed, starting recording...")
-        threading.Thread(target=record_and_transcribe, daemon=True).start()
+        threading.Thread(target=record_and_transcribe, args=(pressed_at,), daemon=True).start()
 
 
 def setup_hotkey():
-    """Set up the hotkey hook."""
+    """Set up the hotkey hooks."""
     print(f"[hotkey] Setting up hotkey: {HOTKEY}")
-    keyboard.on_press_key(HOTKEY, lambda e: on_hotkey_press())
+    hotkey_hooks.append(keyboard.on_press_key(HOTKEY, lambda e: on_hotkey_press()))
+    hotkey_hooks.append(keyboard.on_release_key(HOTKEY, lambda e: hotkey_released.set()))
+
+
+def teardown_hotkey():
+    """Remove the hooks installed by setup_hotkey."""
+    while hotkey_hooks:
+        keyboard.unhook(hotkey_hooks.pop())
 
 
 def main():
@@ -567,7 +602,11 @@ def main():
         print(f"API key loaded")
 
     widget = FloatingWidget()
+    recover_spool(SPOOL_DIR, RECORDINGS_DIR)
     
+    # Open the mic now so the first recording starts instantly
+    threading.Thread(target=warm_capture, daemon=True).start()
+
     # Set up hotkey
     setup_hotkey()
     